@@ -0,0 +1,284 @@
+"""
+In-process benchmark suite for rest-api-template.py.
+Drives the ASGI app directly (no server, no network) through the list, get, create, update
+and batch endpoints, the error path (http_exception_handler), CORS requests and the same
+requests with the middleware stack removed. Reports throughput and latency percentiles and
+writes them to JSON so runs can be compared across commits.
+
+The original list_users serialization path (validate each item, model_dump, List[Any] page,
+response_model re-validation, json.dumps) stays mounted at /bench/legacy for comparison with
+the fast path.
+
+Usage:
+    python rest-api-benchmark.py [--iterations 300] [--concurrency 1] [--output results.json]
+    python rest-api-benchmark.py --compare previous.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from itertools import count
+from pathlib import Path
+from typing import Any, List
+
+TEMPLATE = Path(__file__).with_name("rest-api-template.py")
+DEFAULT_OUTPUT = "rest-api-benchmark.json"
+DEFAULT_SCRYPT_N = 1024  # Measure the template, not the password hash (template default: 16384)
+WARMUP = 10
+
+def load_template():
+    spec = importlib.util.spec_from_file_location("rest_api_template", TEMPLATE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def add_legacy_route(tpl):
+    """The list endpoint as it was before the fast path, mounted on the same app."""
+    from fastapi import Depends
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel
+
+    class LegacyPaginatedResponse(BaseModel):
+        items: List[Any]
+        total: int
+        page: int
+        page_size: int
+        pages: int
+
+    @tpl.app.get("/bench/legacy", response_model=LegacyPaginatedResponse, response_class=JSONResponse)
+    async def legacy_list_users(page_size: int = 20, users=Depends(tpl.get_users)):
+        rows = await users.page_offset(None, None, 0, page_size)
+        items = [tpl.User(**row).model_dump() for row in rows]
+        total = await tpl.cached_total((None, None), lambda: users.count(None, None))
+        return LegacyPaginatedResponse(
+            items=items,
+            total=total,
+            page=1,
+            page_size=page_size,
+            pages=(total + page_size - 1) // page_size
+        )
+
+async def request(app, method: str, path: str, query: str = "", body: bytes = b"",
+                  headers: tuple = ()) -> tuple:
+    """Drive one request through the ASGI app without a server or test client.
+
+    Returns (status, response headers).
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-length", str(len(body)).encode()), *headers],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    received = False
+    response = {}
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # Never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message.get("headers", ()))
+
+    await app(scope, receive, send)
+    return response.get("status", 0), response.get("headers", {})
+
+JSON_BODY = ((b"content-type", b"application/json"),)
+ORIGIN = ((b"origin", b"https://app.example.com"),)
+
+def build_scenarios() -> dict:
+    """{name: (expected status, factory)}; factory() returns the next request's arguments."""
+    emails = count()
+    names = count()
+
+    def get(path, query="", headers=()):
+        return lambda: ("GET", path, query, b"", headers)
+
+    def create_user():
+        body = {"email": f"bench{next(emails)}@example.com", "name": "Bench User", "password": "benchmark-pw"}
+        return "POST", "/api/users", "", json.dumps(body).encode(), JSON_BODY
+
+    def update_user():
+        return "PATCH", "/api/users/42", "", json.dumps({"name": f"Renamed {next(names)}"}).encode(), JSON_BODY
+
+    def preflight():
+        return "OPTIONS", "/api/users", "", b"", ORIGIN + ((b"access-control-request-method", b"GET"),)
+
+    return {
+        "list_users page_size=1": (200, get("/api/users", "page_size=1")),
+        "list_users page_size=20": (200, get("/api/users", "page_size=20")),
+        "list_users page_size=100": (200, get("/api/users", "page_size=100")),
+        "list_users cursor page_size=100": (200, get("/api/users", "pagination=cursor&page_size=100")),
+        "list_users original path page_size=100": (200, get("/bench/legacy", "page_size=100")),
+        "get_user": (200, get("/api/users/7")),
+        "batch_get_users 20 ids": (200, get("/api/users:batchGet", "ids=" + ",".join(map(str, range(20))))),
+        "create_user": (201, create_user),
+        "update_user": (200, update_user),
+        "error get_user not found": (404, get("/api/users/missing")),
+        "error invalid cursor": (400, get("/api/users", "cursor=not-a-cursor")),
+        "cors get_user with Origin": (200, get("/api/users/7", headers=ORIGIN)),
+        "cors preflight": (200, preflight),
+    }
+
+# Re-run without any middleware; the difference from the full run is the stack's cost
+BARE_SCENARIOS = ("get_user", "list_users page_size=20", "error get_user not found")
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_scenario(app, expected: int, factory, iterations: int, concurrency: int) -> dict:
+    """Throughput (req/s) and latency percentiles (us) for one scenario."""
+    for _ in range(WARMUP):
+        await request(app, *factory())
+
+    latencies = []
+    statuses = {}
+    remaining = iterations
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            args = factory()
+            started = time.perf_counter_ns()
+            status, _ = await request(app, *args)
+            latencies.append((time.perf_counter_ns() - started) / 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "expected_status": expected,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_us": round(sum(latencies) / len(latencies), 1),
+        "p50_us": round(percentile(latencies, 50), 1),
+        "p90_us": round(percentile(latencies, 90), 1),
+        "p99_us": round(percentile(latencies, 99), 1),
+        "max_us": round(latencies[-1], 1),
+    }
+
+async def run_suite(tpl, iterations: int, concurrency: int) -> dict:
+    add_legacy_route(tpl)
+    tpl.RATE_LIMIT_RULES = ()  # Read when the middleware stack is built: time requests, not 429s
+
+    results = {}
+
+    async def run(name, expected, factory):
+        results[name] = await run_scenario(tpl.app, expected, factory, iterations, concurrency)
+        print_row(name, results[name])
+
+    async with tpl.lifespan(tpl.app):
+        tpl.response_cache.max_entries = 0  # Measure handlers and serialization, not the response cache
+        scenarios = build_scenarios()
+        for name, (expected, factory) in scenarios.items():
+            await run(name, expected, factory)
+
+        tpl.response_cache.max_entries = tpl.RESPONSE_CACHE_SIZE
+        _, headers = await request(tpl.app, "GET", "/api/users/7")
+        conditional = ((b"if-none-match", headers[b"etag"]),)
+        await run("get_user conditional (cached 304)", 304,
+                  lambda: ("GET", "/api/users/7", "", b"", conditional))
+        tpl.response_cache.max_entries = 0
+
+        tpl.app.user_middleware = []
+        tpl.app.middleware_stack = None  # Rebuilt on the next request without the removed layers
+        for name in BARE_SCENARIOS:
+            await run(f"{name} (no middleware)", *scenarios[name])
+    return results
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=TEMPLATE.parent,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def print_row(name: str, result: dict):
+    unexpected = result["requests"] - result["statuses"].get(str(result["expected_status"]), 0)
+    note = f"  {unexpected} unexpected status: {result['statuses']}" if unexpected else ""
+    print(f"{name:<42} {result['throughput_rps']:>9.0f} {result['p50_us']:>9.0f} {result['p90_us']:>9.0f}"
+          f" {result['p99_us']:>9.0f}{note}")
+
+def print_comparison(current: dict, previous: dict):
+    print(f"\nChange vs {previous.get('commit') or 'previous run'} ({previous.get('timestamp', '?')}):")
+    if previous.get("settings") != current["settings"]:
+        print(f"  note: settings differ ({previous.get('settings')} vs {current['settings']})")
+    print(f"{'scenario':<42} {'req/s':>9} {'p50':>9} {'p99':>9}")
+    for name, result in current["scenarios"].items():
+        old = previous.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        deltas = [(result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                  for key in ("throughput_rps", "p50_us", "p99_us")]
+        print(f"{name:<42} " + " ".join(f"{delta:>+8.1f}%" for delta in deltas))
+
+def main():
+    parser = argparse.ArgumentParser(description="REST API template in-process benchmark suite")
+    parser.add_argument("--iterations", type=int, default=300, help="Requests per scenario (default: 300)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once (default: 1)")
+    parser.add_argument("--scrypt-n", type=int, default=DEFAULT_SCRYPT_N,
+                        help=f"Password hashing cost used by create_user (default: {DEFAULT_SCRYPT_N})")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"Results file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--compare", metavar="JSON", help="Print changes against an earlier results file")
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    # The template reads its settings at import time; give every run a fresh database
+    workdir = tempfile.mkdtemp(prefix="rest-api-benchmark-")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "users.sqlite3")
+    os.environ["SCRYPT_N"] = str(args.scrypt_n)
+    try:
+        tpl = load_template()
+        print(f"{'scenario':<42} {'req/s':>9} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9}")
+        scenarios = asyncio.run(run_suite(tpl, max(1, args.iterations), max(1, args.concurrency)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import fastapi
+    import pydantic
+    import starlette
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "versions": {"fastapi": fastapi.__version__, "starlette": starlette.__version__,
+                     "pydantic": pydantic.VERSION},
+        "settings": {"iterations": args.iterations, "concurrency": args.concurrency,
+                     "scrypt_n": args.scrypt_n, "warmup": WARMUP},
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if previous:
+        print_comparison(report, previous)
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,141 @@
 """
 Production-ready REST API template using FastAPI.
-Includes pagination, filtering, error handling, and best practices.
+Includes a pooled async repository, pagination (offset and keyset/cursor), filtering,
+conditional GET, error handling, and best practices.
 """
 
-from fastapi import FastAPI, HTTPException, Query, Path, Depends, status
+from fastapi import FastAPI, HTTPException, Query, Path, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import Optional, List, Any
-from datetime import datetime
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, ValidationError
+from pydantic_core import to_json
+from typing import Optional, List, Any, Union, Dict, NamedTuple
+from datetime import datetime, timedelta, timezone
 from enum import Enum
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from email.utils import format_datetime, parsedate_to_datetime
+import asyncio
+import base64
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+import zlib
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by pydantic-core (Rust): models, datetimes and enums in one pass."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+# Database
+# A fixed-size pool is opened once at startup and closed at shutdown (lifespan), never per request.
+# SQLite (stdlib) stands in for the real database; blocking calls run in worker threads so the
+# event loop stays free. Swap ConnectionPool for asyncpg.create_pool / SQLAlchemy's async engine
+# in a real service - the Session/Repository API stays the same.
+DATABASE_PATH = os.environ.get("DATABASE_PATH", os.path.join(tempfile.gettempdir(), "rest-api-template.sqlite3"))
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = 5.0  # Seconds to wait for a free connection before failing the request
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "1000"))
+SCRYPT_N = int(os.environ.get("SCRYPT_N", str(2**14)))  # Password hashing cost (CPU per user)
+STATEMENT_CACHE_SIZE = 128  # Prepared statements kept per connection, keyed by SQL text
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections handed out through an asyncio.Queue."""
+
+    def __init__(self, database: str, size: int = POOL_SIZE):
+        self.database = database
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._connections: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, check_same_thread=False, isolation_level=None,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")  # Readers never block the writer
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    async def open(self):
+        for _ in range(self.size):
+            conn = await asyncio.to_thread(self._connect)
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._connections:
+            await asyncio.to_thread(conn.close)
+        self._connections.clear()
+
+    @asynccontextmanager
+    async def connection(self):
+        try:
+            conn = await asyncio.wait_for(self._idle.get(), POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Database connection pool exhausted")
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+class Session:
+    """One pooled connection per request: acquired on first query, released when the request ends."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._lease = None
+        self._conn = None
+
+    async def run(self, fn, *args):
+        """Run fn(connection, *args) in a worker thread on this request's connection."""
+        if self._conn is None:
+            self._lease = self.pool.connection()
+            self._conn = await self._lease.__aenter__()
+        return await asyncio.to_thread(fn, self._conn, *args)
+
+    async def close(self):
+        if self._lease is not None:
+            self._conn = None
+            await self._lease.__aexit__(None, None, None)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = ConnectionPool(DATABASE_PATH)
+    await pool.open()
+    async with pool.connection() as conn:
+        await asyncio.to_thread(UserRepository.create_schema, conn)
+    app.state.pool = pool
+    try:
+        yield
+    finally:
+        await pool.close()
+
+async def get_session(request: Request):
+    session = Session(request.app.state.pool)
+    try:
+        yield session
+    finally:
+        await session.close()
 
 app = FastAPI(
     title="API Template",
     version="1.0.0",
-    docs_url="/api/docs"
-)
-
-# Security Middleware
-# Trusted Host: Prevents HTTP Host Header attacks
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=["*"] # TODO: Configure this in production, e.g. ["api.example.com"]
-)
-
-# CORS: Configures Cross-Origin Resource Sharing
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], # TODO: Update this with specific origins in production
-    allow_credentials=False, # TODO: Set to True if you need cookies/auth headers, but restrict origins
-    allow_methods=["*"],
-    allow_headers=["*"],
+    docs_url="/api/docs",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Models
@@ -66,12 +170,70 @@ class PaginationParams(BaseModel):
     page_size: int = Field(20, ge=1, le=100)
 
 class PaginatedResponse(BaseModel):
-    items: List[Any]
+    items: List[User]
     total: int
     page: int
     page_size: int
     pages: int
 
+class PaginationLinks(BaseModel):
+    next: Optional[str] = None
+    prev: Optional[str] = None
+
+class CursorPaginatedResponse(BaseModel):
+    items: List[User]
+    page_size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    links: PaginationLinks
+    total: Optional[int] = None  # Only with include_total=true (served from a short-lived cache)
+
+# Keyset pagination: rows are ordered by a stable, unique key (created_at, id) and a page
+# starts right after the last key of the previous one, so every page is an index range scan:
+#   WHERE (created_at, id) > (:created_at, :id) ORDER BY created_at, id LIMIT :page_size + 1
+# instead of OFFSET, which reads and discards every row before the page.
+def sort_key(user: dict) -> tuple:
+    return (user["created_at"], user["id"])
+
+def encode_cursor(key: tuple, direction: str) -> str:
+    """Opaque cursor: clients must not build or parse these."""
+    payload = json.dumps({"k": [key[0].isoformat(), key[1]], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return (key, direction); malformed cursors are a client error."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at, user_id = payload["k"]
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return (datetime.fromisoformat(created_at), str(user_id)), direction
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid cursor", "details": [{"field": "cursor", "message": "Malformed or expired cursor", "code": "invalid_cursor"}]}
+        )
+
+# COUNT(*) over a large table is as expensive as the scan it describes; totals are cached per filter
+TOTAL_CACHE_TTL = 30.0
+TOTAL_CACHE_SIZE = 256  # Filters include free-text search, so the key space is client-controlled
+_total_cache: OrderedDict = OrderedDict()
+
+async def cached_total(filters: tuple, count) -> int:
+    now = time.monotonic()
+    hit = _total_cache.get(filters)
+    if hit is not None and hit[1] < now:
+        del _total_cache[filters]
+        hit = None
+    if hit is None:
+        hit = (await count(), now + TOTAL_CACHE_TTL)
+        _total_cache[filters] = hit
+        while len(_total_cache) > TOTAL_CACHE_SIZE:
+            _total_cache.popitem(last=False)
+    _total_cache.move_to_end(filters)
+    return hit[0]
+
 # Error handling
 class ErrorDetail(BaseModel):
     field: Optional[str] = None
@@ -83,99 +245,1005 @@ class ErrorResponse(BaseModel):
     message: str
     details: Optional[List[ErrorDetail]] = None
 
+# Batch operations: items are validated one by one so a bad item fails alone, not the whole batch
+class UserBatchUpdate(UserUpdate):
+    id: str
+
+class BatchRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # "created" | "updated" | "error"
+    user: Optional[User] = None
+    errors: Optional[List[ErrorDetail]] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    # Shape of ErrorResponse, built directly: error bodies come from our own code
+    return FastJSONResponse(
         status_code=exc.status_code,
-        content=ErrorResponse(
-            error=exc.__class__.__name__,
-            message=exc.detail if isinstance(exc.detail, str) else exc.detail.get("message", "Error"),
-            details=exc.detail.get("details") if isinstance(exc.detail, dict) else None
-        ).model_dump()
+        content={
+            "error": exc.__class__.__name__,
+            "message": exc.detail if isinstance(exc.detail, str) else exc.detail.get("message", "Error"),
+            "details": exc.detail.get("details") if isinstance(exc.detail, dict) else None
+        },
+        headers=getattr(exc, "headers", None)
+    )
+
+# Fast path for trusted data: store rows were validated once on write, so responses wrap them
+# with model_construct (no validation) and are encoded once by FastJSONResponse. Returning a
+# Response also skips FastAPI's response_model re-validation; response_model still drives the docs.
+def trusted_users(rows: List[dict]) -> List[User]:
+    return [User.model_construct(**row) for row in rows]
+
+def fast_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> FastJSONResponse:
+    return FastJSONResponse(content=model, status_code=status_code)
+
+# Conditional GET + response cache
+# Read handlers set a weak ETag (from updated_at or the database's collection version). The middleware keeps
+# the serialized body (only for responses that carry an ETag) in a bounded LRU: repeated polls are answered from memory, and a matching
+# If-None-Match gets a bodyless 304 without running the handler or serializing anything.
+RESPONSE_CACHE_SIZE = 1024
+CACHE_CONTROL = "private, no-cache"  # Clients may store responses but must revalidate with the ETag
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+class ResponseCache:
+    """LRU of serialized 200 responses keyed by path, query and credentials."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.generation = 0  # Bumped on every invalidation; stale in-flight fills are dropped
+
+    @staticmethod
+    def key(request: Request) -> tuple:
+        return (request.url.path, request.url.query, request.headers.get("authorization"))
+
+    def get(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: tuple, generation: int):
+        if generation != self.generation:
+            return
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *paths: str):
+        self.generation += 1
+        for key in [k for k in self.entries if k[0] in paths]:
+            del self.entries[key]
+
+response_cache = ResponseCache()
+
+def not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return "etag" in headers and etag_matches(if_none_match, headers["etag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "last-modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cacheable(path: str) -> bool:
+    """Only the list and single-user reads set ETags; everything else (/metrics, docs, exports)
+    passes straight through without touching the pool."""
+    return path == "/api/users" or path.startswith("/api/users/")
+
+async def collection_version(pool: ConnectionPool) -> str:
+    async with pool.connection() as conn:
+        return await asyncio.to_thread(UserRepository.fetch_version, conn)
+
+@app.middleware("http")
+async def conditional_get_middleware(request: Request, call_next):
+    if request.method != "GET" or not cacheable(request.url.path):
+        return await call_next(request)
+
+    key = response_cache.key(request)
+    entry = response_cache.get(key)
+    # Other workers write to the same database without touching this process's cache: an entry is
+    # only served while the database's collection version still matches the one it was filled at
+    version = await collection_version(request.app.state.pool)
+    if entry is None or entry[3] != version:
+        generation = response_cache.generation
+        response = await call_next(request)
+        if response.status_code != 200 or "etag" not in response.headers:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        entry = (body, headers, request.scope.get("route"), version)
+        response_cache.put(key, entry, generation)
+
+    body, headers, route, _ = entry
+    request.scope["route"] = route  # Hits skip routing; keep the route visible to outer middleware
+    validators = {k: v for k, v in headers.items() if k in ("etag", "last-modified", "cache-control")}
+    if not_modified(request, headers):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    return Response(content=body, status_code=status.HTTP_200_OK, headers=headers)
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)  # Naive timestamps are stored as UTC
+        response.headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+# Rate limiting
+# Token buckets per (client, rule): each request costs one token, tokens refill continuously at
+# `rate` per second up to `burst`. Refill is computed lazily from the elapsed time on the next hit,
+# so a check is O(1) with no background timer. Buckets live in LRU-ordered shards; an idle bucket
+# has refilled to `burst`, which is exactly a fresh bucket, so evicting it loses nothing.
+class RateLimitRule(NamedTuple):
+    name: str
+    path_prefix: str
+    rate: float  # Tokens per second
+    burst: int  # Bucket size
+    methods: Optional[tuple] = None  # None matches every method
+
+RATE_LIMIT_RULES = (  # First match wins; unmatched paths (docs, /metrics) are not limited
+    RateLimitRule("export", "/api/users:export", rate=0.2, burst=2),
+    RateLimitRule("writes", "/api/", rate=20, burst=40, methods=("POST", "PUT", "PATCH", "DELETE")),
+    RateLimitRule("reads", "/api/", rate=50, burst=100),
+)
+RATE_LIMIT_SHARDS = 16
+RATE_LIMIT_MAX_BUCKETS = 100_000  # Across all shards
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    reset: float  # Seconds until the bucket is full again
+    retry_after: float  # Seconds until the next token (0 when allowed)
+
+class RateLimitBackend(ABC):
+    """Bucket store interface. Implement hit() over a shared store (e.g. a Redis Lua script doing
+    the same refill-and-take atomically) to enforce limits across processes."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: float, burst: int) -> RateLimitResult:
+        """Refill the bucket for `key`, then take one token if available."""
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; only touched from the event loop, so no locks."""
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_buckets: int = RATE_LIMIT_MAX_BUCKETS):
+        self.shards = [OrderedDict() for _ in range(shards)]
+        self.max_per_shard = max(1, max_buckets // shards)
+
+    async def hit(self, key: str, rate: float, burst: int) -> RateLimitResult:
+        now = time.monotonic()
+        shard = self.shards[hash(key) % len(self.shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = [float(burst), now, burst / rate]  # tokens, last hit, time to refill
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            shard.move_to_end(key)
+
+        allowed = bucket[0] >= 1
+        if allowed:
+            bucket[0] -= 1
+        self._evict(shard, now)
+        return RateLimitResult(
+            allowed=allowed,
+            remaining=int(bucket[0]),
+            reset=(burst - bucket[0]) / rate,
+            retry_after=0.0 if allowed else (1 - bucket[0]) / rate
+        )
+
+    def _evict(self, shard: OrderedDict, now: float):
+        while len(shard) > self.max_per_shard:
+            shard.popitem(last=False)
+        for _ in range(2):  # Amortized idle eviction from the least recently used end
+            oldest = next(iter(shard.items()), None)
+            # Shards mix rules, so each bucket is only dropped once its own rule has refilled it
+            if oldest is None or now - oldest[1][1] < oldest[1][2]:
+                break
+            del shard[oldest[0]]
+
+def client_key(scope) -> str:
+    """Authenticated principal when present, else the peer address (put a trusted proxy's header here).
+
+    Raw Authorization / X-API-Key headers are never used: unverified, a fresh random value per
+    request would get a fresh bucket. Verify credentials in an authentication middleware added
+    *after* this one (so it runs first) and set scope["user"], as Starlette's
+    AuthenticationMiddleware does.
+    """
+    user = scope.get("user")
+    if user is not None and getattr(user, "is_authenticated", False):
+        return "user:" + user.display_name
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+class RateLimitMiddleware:
+    def __init__(self, app, backend: RateLimitBackend, rules: Optional[tuple] = None, key_func=client_key):
+        self.app = app
+        self.backend = backend
+        self.rules = RATE_LIMIT_RULES if rules is None else rules
+        self.key_func = key_func
+
+    def _rule(self, method: str, path: str) -> Optional[RateLimitRule]:
+        if method == "OPTIONS":
+            return None  # CORS preflights are answered by CORSMiddleware and must not spend tokens
+        for rule in self.rules:
+            if path.startswith(rule.path_prefix) and (rule.methods is None or method in rule.methods):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        rule = self._rule(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        result = await self.backend.hit(f"{rule.name}:{self.key_func(scope)}", rule.rate, rule.burst)
+        headers = [
+            (b"ratelimit-limit", str(rule.burst).encode()),
+            (b"ratelimit-remaining", str(result.remaining).encode()),
+            (b"ratelimit-reset", str(int(result.reset + 0.999)).encode()),
+            (b"ratelimit-policy", f"{rule.burst};w={int(rule.burst / rule.rate + 0.999)}".encode()),
+        ]
+        if not result.allowed:
+            retry_after = str(int(result.retry_after + 0.999))
+            response = FastJSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"error": "RateLimitExceeded", "message": f"Rate limit exceeded, retry in {retry_after}s", "details": None},
+                headers={"Retry-After": retry_after, **{k.decode(): v.decode() for k, v in headers}}
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+app.add_middleware(RateLimitMiddleware, backend=InMemoryRateLimitBackend())
+
+# Security Middleware
+# Added after the response cache and the rate limiter so they wrap both (the last middleware added
+# runs first): cache hits are still host-checked, CORS headers are computed per request instead of
+# replayed from the cached response of whichever Origin filled it, and 429s carry CORS headers so
+# browsers can read the status and Retry-After.
+# Trusted Host: Prevents HTTP Host Header attacks
+app.add_middleware(
+    TrustedHostMiddleware,
+    allowed_hosts=["*"] # TODO: Configure this in production, e.g. ["api.example.com"]
+)
+
+# CORS: Configures Cross-Origin Resource Sharing
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"], # TODO: Update this with specific origins in production
+    allow_credentials=False, # TODO: Set to True if you need cookies/auth headers, but restrict origins
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Metrics
+# Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead), added last so it is outermost
+# and times the whole stack. Routes are labelled by their template (/api/users/{user_id}), not the
+# raw path, to keep label cardinality bounded. Counters are only touched from the event loop
+# thread between awaits, so plain dict increments are race-free without locks.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "0"))  # 0 disables slow-request logging
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+slow_request_log = logging.getLogger("api.slow_requests")
+# Clients choose the verb; anything else is folded into one series
+METRIC_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metrics:
+    """Request counts, latency histograms, payload sizes and in-flight requests per route and status."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        self.latency: Dict[tuple, list] = {}  # key -> per-bucket counts (last slot is +Inf)
+        self.latency_sum = defaultdict(float)
+        self.request_bytes = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+
+    def observe(self, key: tuple, seconds: float, request_bytes: int, response_bytes: int):
+        counts = self.latency.get(key)
+        if counts is None:
+            counts = self.latency[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, seconds)] += 1
+        self.latency_sum[key] += seconds
+        self.request_bytes[key] += request_bytes
+        self.response_bytes[key] += response_bytes
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests by method, route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        labels = {key: 'method="%s",route="%s",status="%s"' % tuple(map(_label, key)) for key in self.latency}
+        for key, counts in self.latency.items():
+            lines.append(f"http_requests_total{{{labels[key]}}} {sum(counts)}")
+
+        lines += ["# HELP http_request_duration_seconds Request latency.",
+                  "# TYPE http_request_duration_seconds histogram"]
+        for key, counts in self.latency.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'http_request_duration_seconds_bucket{{{labels[key]},le="{le}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels[key]}}} {self.latency_sum[key]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels[key]}}} {cumulative}")
+
+        for name, values, help_text in (
+            ("http_request_size_bytes", self.request_bytes, "Request body sizes."),
+            ("http_response_size_bytes", self.response_bytes, "Response body sizes."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+            for key, total in values.items():
+                lines.append(f"{name}_sum{{{labels[key]}}} {total}")
+                lines.append(f"{name}_count{{{labels[key]}}} {sum(self.latency[key])}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # Reported if the app fails before starting a response
+        request_bytes = response_bytes = 0
+
+        async def counting_receive():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight -= 1
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"] if scope["method"] in METRIC_METHODS else "OTHER"
+            self.metrics.observe((method, route, str(status_code)), elapsed, request_bytes, response_bytes)
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+                slow_request_log.warning(
+                    "slow request: %s %s (route %s) -> %s in %.3fs, %d bytes in, %d bytes out",
+                    scope["method"], scope["path"], route, status_code, elapsed, request_bytes, response_bytes
+                )
+
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Repository
+# SQL lives in constants so every call reuses the connection's prepared statement for it.
+# Optional filters are written as (:param IS NULL OR ...) to keep one statement per query shape.
+USER_COLUMNS = "id, email, name, status, created_at, updated_at"
+USER_FILTER = """(:status IS NULL OR status = :status)
+    AND (:search IS NULL OR name LIKE :search ESCAPE '\\' OR email LIKE :search ESCAPE '\\')"""
+MOCK_EPOCH = datetime(2024, 1, 1)
+MOCK_USER_COUNT = 100
+
+def db_timestamp(value: datetime) -> str:
+    """Fixed-width ISO text, so (created_at, id) sorts correctly as strings."""
+    return value.isoformat(timespec="microseconds")
+
+def like_pattern(search: Optional[str]) -> Optional[str]:
+    if not search:
+        return None
+    return "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def hash_password(password: str) -> str:
+    """scrypt with a random salt; CPU-bound, so callers run it off the event loop."""
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=8, p=1, maxmem=256 * SCRYPT_N * 8 + 2**20)
+    return f"scrypt${salt.hex()}${digest.hex()}"
+
+class UserRepository:
+    """Data access for users; every method is a single statement (one round-trip)."""
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            email TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            password_hash TEXT,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS users_created_at_id ON users (created_at, id);
+        -- Collection version, kept in the database so it survives restarts and is shared by every
+        -- worker; the epoch is new whenever the database is recreated
+        CREATE TABLE IF NOT EXISTS users_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+            BEGIN UPDATE users_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+            BEGIN UPDATE users_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+            BEGIN UPDATE users_version SET version = version + 1; END;
+    """
+    VERSION = "SELECT epoch || '.' || version FROM users_version"
+    # One statement for any number of ids: the list travels as a single JSON parameter
+    GET_MANY = f"SELECT {USER_COLUMNS} FROM users WHERE id IN (SELECT value FROM json_each(?))"
+    COUNT = f"SELECT count(*) FROM users WHERE {USER_FILTER}"
+    PAGE_OFFSET = f"""SELECT {USER_COLUMNS} FROM users WHERE {USER_FILTER}
+        ORDER BY created_at, id LIMIT :limit OFFSET :offset"""
+    PAGE_AFTER = f"""SELECT {USER_COLUMNS} FROM users
+        WHERE {USER_FILTER} AND (created_at, id) > (:created_at, :id)
+        ORDER BY created_at, id LIMIT :limit"""
+    PAGE_BEFORE = f"""SELECT {USER_COLUMNS} FROM users
+        WHERE {USER_FILTER} AND (created_at, id) < (:created_at, :id)
+        ORDER BY created_at DESC, id DESC LIMIT :limit"""
+    INSERT = f"""INSERT INTO users (id, email, name, password_hash, status, created_at, updated_at)
+        VALUES (:id, :email, :name, :password_hash, :status, :created_at, :updated_at)
+        RETURNING {USER_COLUMNS}"""
+    UPDATE = f"""UPDATE users SET
+            email = coalesce(:email, email),
+            name = coalesce(:name, name),
+            status = coalesce(:status, status),
+            updated_at = :updated_at
+        WHERE id = :id RETURNING {USER_COLUMNS}"""
+    DELETE = "DELETE FROM users WHERE id = ?"
+    EXPORT = f"SELECT {USER_COLUMNS} FROM users WHERE {USER_FILTER} ORDER BY created_at, id"
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @classmethod
+    def create_schema(cls, conn: sqlite3.Connection):
+        conn.executescript(cls.SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO users_version (id, epoch, version) VALUES (1, ?, 0)", (uuid.uuid4().hex,))
+        if conn.execute("SELECT count(*) FROM users").fetchone()[0] == 0:
+            conn.executemany(cls.INSERT.replace(f"RETURNING {USER_COLUMNS}", ""), [
+                {"id": str(i), "email": f"user{i}@example.com", "name": f"User {i}", "password_hash": None,
+                 "status": UserStatus.ACTIVE.value, "created_at": db_timestamp(MOCK_EPOCH + timedelta(minutes=i)),
+                 "updated_at": db_timestamp(MOCK_EPOCH + timedelta(minutes=i))}
+                for i in range(MOCK_USER_COUNT)
+            ])
+
+    @staticmethod
+    def _user(row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "email": row["email"],
+            "name": row["name"],
+            "status": UserStatus(row["status"]),
+            "created_at": datetime.fromisoformat(row["created_at"]),
+            "updated_at": datetime.fromisoformat(row["updated_at"]),
+        }
+
+    async def _fetch_all(self, sql: str, params) -> List[dict]:
+        rows = await self.session.run(lambda conn: conn.execute(sql, params).fetchall())
+        return [self._user(row) for row in rows]
+
+    async def _fetch_one(self, sql: str, params) -> Optional[dict]:
+        row = await self.session.run(lambda conn: conn.execute(sql, params).fetchone())
+        return self._user(row) if row is not None else None
+
+    @staticmethod
+    def _filters(status: Optional[UserStatus], search: Optional[str]) -> dict:
+        return {"status": status.value if status else None, "search": like_pattern(search)}
+
+    @classmethod
+    def fetch_many(cls, conn: sqlite3.Connection, user_ids: List[str]) -> Dict[str, dict]:
+        rows = conn.execute(cls.GET_MANY, (json.dumps(user_ids),)).fetchall()
+        return {row["id"]: cls._user(row) for row in rows}
+
+    @classmethod
+    def fetch_version(cls, conn: sqlite3.Connection) -> str:
+        return conn.execute(cls.VERSION).fetchone()[0]
+
+    async def version(self) -> str:
+        """Collection version; read it before the data it validates so a racing write is never masked."""
+        return await self.session.run(self.fetch_version)
+
+    async def count(self, status: Optional[UserStatus], search: Optional[str]) -> int:
+        params = self._filters(status, search)
+        return await self.session.run(lambda conn: conn.execute(self.COUNT, params).fetchone()[0])
+
+    async def page_offset(self, status, search, offset: int, limit: int) -> List[dict]:
+        return await self._fetch_all(self.PAGE_OFFSET, {**self._filters(status, search), "offset": offset, "limit": limit})
+
+    async def page_keyset(self, status, search, key: Optional[tuple], direction: str, limit: int):
+        """Page after (next) or before (prev) key: (items, has_prev, has_next). Reads limit + 1 rows."""
+        params = {**self._filters(status, search), "limit": limit + 1}
+        if key is None:
+            params.update(created_at="", id="")
+        else:
+            params.update(created_at=db_timestamp(key[0]), id=key[1])
+        if direction == "prev" and key is not None:
+            rows = await self._fetch_all(self.PAGE_BEFORE, params)
+            more = len(rows) > limit
+            return list(reversed(rows[:limit])), more, True
+        rows = await self._fetch_all(self.PAGE_AFTER, params)
+        return rows[:limit], key is not None, len(rows) > limit
+
+    async def create(self, user: UserCreate) -> dict:
+        now = db_timestamp(datetime.now())
+        params = {
+            "id": str(uuid.uuid4()), "email": user.email, "name": user.name,
+            "password_hash": await asyncio.to_thread(hash_password, user.password),
+            "status": user.status.value, "created_at": now, "updated_at": now,
+        }
+        try:
+            return await self._fetch_one(self.INSERT, params)
+        except sqlite3.IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Email already registered", "details": [{"field": "email", "message": "Email already registered", "code": "conflict"}]}
+            )
+
+    async def update(self, user_id: str, update: UserUpdate) -> Optional[dict]:
+        """Apply the set fields and return the new row, or None if the user does not exist."""
+        data = update.model_dump(exclude_unset=True)
+        params = {
+            "id": user_id,
+            "email": data.get("email"),
+            "name": data.get("name"),
+            "status": data["status"].value if data.get("status") else None,
+            "updated_at": db_timestamp(datetime.now()),
+        }
+        return await self._fetch_one(self.UPDATE, params)
+
+    async def delete(self, user_id: str) -> bool:
+        return await self.session.run(lambda conn: conn.execute(self.DELETE, (user_id,)).rowcount) > 0
+
+    def _write_batch(self, conn: sqlite3.Connection, sql: str, batch: List[tuple]) -> List[tuple]:
+        """Run one statement per item inside a single transaction: [(index, row or error code)].
+
+        A constraint violation aborts only its own statement in SQLite, so one bad item does not
+        undo the others. (With PostgreSQL, send the whole batch as one INSERT ... SELECT FROM
+        unnest(...) ON CONFLICT DO NOTHING RETURNING statement instead.)
+        """
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for index, params in batch:
+                try:
+                    row = conn.execute(sql, params).fetchone()
+                except sqlite3.IntegrityError:
+                    results.append((index, "conflict"))
+                    continue
+                results.append((index, row if row is not None else "not_found"))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def create_many(self, users: List[tuple]) -> List[tuple]:
+        """Insert [(index, UserCreate)] in one transaction: [(index, user dict or error code)]."""
+        # Hash in one chunk per CPU: parallel where scrypt releases the GIL, without a thread hop per item
+        passwords = [user.password for _, user in users]
+        step = -(-len(passwords) // (os.cpu_count() or 1))
+        chunks = await asyncio.gather(*(
+            asyncio.to_thread(lambda part: [hash_password(p) for p in part], passwords[i:i + step])
+            for i in range(0, len(passwords), step)
+        ))
+        hashes = [h for chunk in chunks for h in chunk]
+        now = db_timestamp(datetime.now())
+        batch = [(index, {
+            "id": str(uuid.uuid4()), "email": user.email, "name": user.name, "password_hash": password_hash,
+            "status": user.status.value, "created_at": now, "updated_at": now,
+        }) for (index, user), password_hash in zip(users, hashes)]
+        results = await self.session.run(self._write_batch, self.INSERT, batch)
+        return [(index, self._user(row) if isinstance(row, sqlite3.Row) else row) for index, row in results]
+
+    async def update_many(self, updates: List[tuple]) -> List[tuple]:
+        """Apply [(index, UserBatchUpdate)] in one transaction: [(index, user dict or error code)]."""
+        now = db_timestamp(datetime.now())
+        batch = []
+        for index, update in updates:
+            data = update.model_dump(exclude_unset=True)
+            batch.append((index, {
+                "id": update.id,
+                "email": data.get("email"),
+                "name": data.get("name"),
+                "status": data["status"].value if data.get("status") else None,
+                "updated_at": now,
+            }))
+        results = await self.session.run(self._write_batch, self.UPDATE, batch)
+        return [(index, self._user(row) if isinstance(row, sqlite3.Row) else row) for index, row in results]
+
+    @classmethod
+    async def stream(cls, pool: ConnectionPool, status, search, batch_size: int):
+        """Yield batches from one server-side cursor on a connection held for the whole stream.
+
+        Rows are stepped batch_size at a time, so memory stays constant however large the table.
+        The connection is leased here rather than from the request Session because a streaming
+        body outlives the endpoint function.
+        """
+        async with pool.connection() as conn:
+            cursor = await asyncio.to_thread(conn.execute, cls.EXPORT, cls._filters(status, search))
+            try:
+                while rows := await asyncio.to_thread(cursor.fetchmany, batch_size):
+                    yield [cls._user(row) for row in rows]
+            finally:
+                cursor.close()
+
+async def get_users(session: Session = Depends(get_session)) -> UserRepository:
+    return UserRepository(session)
+
+# Read coalescing
+# UserLookups is process-wide single-flight: a lookup of an id that is already being fetched joins
+# that fetch instead of issuing another query, so a burst of identical reads (e.g. after a cache
+# flush) costs one query. UserLoader is a per-request DataLoader: ids requested in the same event
+# loop tick are collected and fetched together in one multi-id query, and memoized for the request.
+class UserLookups:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_many(self, pool: ConnectionPool, user_ids: List[str]) -> Dict[str, Optional[dict]]:
+        loop = asyncio.get_running_loop()
+        futures, owned = {}, {}
+        for user_id in dict.fromkeys(user_ids):
+            future = self._inflight.get(user_id)
+            if future is None:
+                future = owned[user_id] = self._inflight[user_id] = loop.create_future()
+            futures[user_id] = future
+        if owned:
+            # Detached from the caller: a disconnecting leader must not cancel its followers' read
+            asyncio.ensure_future(self._fetch(pool, owned))
+        return {user_id: await asyncio.shield(future) for user_id, future in futures.items()}
+
+    async def _fetch(self, pool: ConnectionPool, owned: Dict[str, asyncio.Future]):
+        try:
+            async with pool.connection() as conn:
+                found = await asyncio.to_thread(UserRepository.fetch_many, conn, list(owned))
+            for user_id, future in owned.items():
+                if not future.done():
+                    future.set_result(found.get(user_id))
+        except BaseException as exc:
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            for user_id, future in owned.items():
+                if self._inflight.get(user_id) is future:
+                    del self._inflight[user_id]
+
+    def forget(self, *user_ids: str):
+        """Reads that start after a write must not join a fetch that started before it."""
+        for user_id in user_ids:
+            self._inflight.pop(user_id, None)
+
+user_lookups = UserLookups()
+
+class UserLoader:
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._cache: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+
+    def load(self, user_id: str) -> asyncio.Future:
+        future = self._cache.get(user_id)
+        if future is None or future.cancelled():
+            loop = asyncio.get_running_loop()
+            future = self._cache[user_id] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)  # Runs after every load() of the current tick
+            self._queue.append(user_id)
+        return future
+
+    async def load_many(self, user_ids: List[str]) -> List[Optional[dict]]:
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def _dispatch(self):
+        batch, self._queue = self._queue, []
+        asyncio.ensure_future(self._resolve(batch))
+
+    async def _resolve(self, batch: List[str]):
+        try:
+            found = await user_lookups.get_many(self.pool, batch)
+        except BaseException as exc:
+            for user_id in batch:
+                future = self._cache.pop(user_id)
+                if not future.done():  # Awaiters cancelled on client disconnect cancel their future
+                    future.set_exception(exc)
+            return
+        for user_id in batch:
+            future = self._cache[user_id]
+            if not future.done():
+                future.set_result(found.get(user_id))
+
+async def get_user_loader(request: Request) -> UserLoader:
+    return UserLoader(request.app.state.pool)
+
+def touch_users(*user_ids: str):
+    """Record a write: drop cached totals and cached responses (the database bumps the version)."""
+    _total_cache.clear()
+    response_cache.invalidate("/api/users", *(f"/api/users/{user_id}" for user_id in user_ids))
+    user_lookups.forget(*user_ids)
+
+def user_not_found(user_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail={"message": "User not found", "details": [{"field": "user_id", "message": f"No user with id {user_id}", "code": "not_found"}]}
     )
 
+# Bulk export
+# One streaming response instead of thousands of paged requests. The body is an async generator:
+# Starlette only pulls the next batch after the previous chunk was handed to the server, so a slow
+# client throttles the database cursor (backpressure) instead of buffering the export in memory.
+EXPORT_BATCH_SIZE = 500
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+CSV_FIELDS = ["id", "email", "name", "status", "created_at", "updated_at"]
+
+def encode_ndjson(batch: List[dict], first: bool) -> bytes:
+    return b"".join(to_json(user) + b"\n" for user in batch)
+
+def encode_csv(batch: List[dict], first: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if first:
+        writer.writerow(CSV_FIELDS)
+    for user in batch:
+        writer.writerow([user["id"], user["email"], user["name"], user["status"].value,
+                         user["created_at"].isoformat(), user["updated_at"].isoformat()])
+    return buf.getvalue().encode()
+
+EXPORT_ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv}
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+async def export_body(pool: ConnectionPool, fmt: str, status, search, compress: bool):
+    encode = EXPORT_ENCODERS[fmt]
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip container
+    first = True
+    async for batch in UserRepository.stream(pool, status, search, EXPORT_BATCH_SIZE):
+        chunk = encode(batch, first)
+        first = False
+        if gzip is not None:
+            chunk = gzip.compress(chunk)
+        if chunk:
+            yield chunk
+    if first and fmt == "csv":
+        chunk = encode([], True)
+        yield gzip.compress(chunk) if gzip is not None else chunk
+    if gzip is not None:
+        yield gzip.flush()
+
 # Endpoints
-@app.get("/api/users", response_model=PaginatedResponse, tags=["Users"])
+@app.get("/api/users", response_model=Union[CursorPaginatedResponse, PaginatedResponse], tags=["Users"])
 async def list_users(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     status: Optional[UserStatus] = Query(None),
-    search: Optional[str] = Query(None)
+    search: Optional[str] = Query(None),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="Use 'cursor' for large tables"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor/prev_cursor"),
+    include_total: bool = Query(False, description="Cursor mode: also return the (cached) total"),
+    users: UserRepository = Depends(get_users)
 ):
-    """List users with pagination and filtering."""
-    # Mock implementation
-    total = 100
-    items = [
-        User(
-            id=str(i),
-            email=f"user{i}@example.com",
-            name=f"User {i}",
-            status=UserStatus.ACTIVE,
-            created_at=datetime.now(),
-            updated_at=datetime.now()
-        ).model_dump()
-        for i in range((page-1)*page_size, min(page*page_size, total))
-    ]
+    """List users with offset or keyset (cursor) pagination and filtering."""
+    filters = (status, search)
+    etag = weak_etag("users", await users.version(), request.url.query)
+
+    if pagination == "cursor" or cursor is not None:
+        key, direction = decode_cursor(cursor) if cursor else (None, "next")
+        items, has_prev, has_next = await users.page_keyset(status, search, key, direction, page_size)
+        next_cursor = encode_cursor(sort_key(items[-1]), "next") if items and has_next else None
+        prev_cursor = encode_cursor(sort_key(items[0]), "prev") if items and has_prev else None
+        base_url = request.url.remove_query_params(["cursor", "page"]).include_query_params(pagination="cursor")
+        page_model = CursorPaginatedResponse.model_construct(
+            items=trusted_users(items),
+            page_size=page_size,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            links=PaginationLinks.model_construct(
+                next=str(base_url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+                prev=str(base_url.include_query_params(cursor=prev_cursor)) if prev_cursor else None
+            ),
+            total=await cached_total(filters, lambda: users.count(status, search)) if include_total else None
+        )
+        response = fast_response(page_model)
+        set_validators(response, etag)
+        return response
+
+    # Offset mode (kept for backward compatibility): cost grows with the page number
+    total = await cached_total(filters, lambda: users.count(status, search))
+    items = await users.page_offset(status, search, (page-1)*page_size, page_size)
 
-    return PaginatedResponse(
-        items=items,
+    response = fast_response(PaginatedResponse.model_construct(
+        items=trusted_users(items),
         total=total,
         page=page,
         page_size=page_size,
         pages=(total + page_size - 1) // page_size
+    ))
+    set_validators(response, etag)
+    return response
+
+@app.get(
+    "/api/users:export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+    tags=["Users"]
+)
+async def export_users(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[UserStatus] = Query(None),
+    search: Optional[str] = Query(None)
+):
+    """Stream every matching user as NDJSON or CSV (gzip when the client accepts it)."""
+    compress = accepts_gzip(request)
+    headers = {
+        "Content-Disposition": f'attachment; filename="users.{format}"',
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-store",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_body(request.app.state.pool, format, status, search, compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers
     )
 
+BATCH_ERRORS = {
+    "conflict": ErrorDetail(field="email", message="Email already registered", code="conflict"),
+    "not_found": ErrorDetail(field="id", message="User not found", code="not_found"),
+}
+
+def validate_batch(items: List[Dict[str, Any]], model) -> tuple:
+    """Validate every item in one pass: ([(index, model)], [BatchItemResult errors])."""
+    valid, failed = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as exc:
+            failed.append(BatchItemResult(index=index, status="error", errors=[
+                ErrorDetail(field=".".join(map(str, err["loc"])) or None, message=err["msg"], code=err["type"])
+                for err in exc.errors()
+            ]))
+    return valid, failed
+
+def batch_response(written: List[tuple], failed: List[BatchItemResult], success: str) -> FastJSONResponse:
+    results = failed + [
+        BatchItemResult.model_construct(index=index, status=success, user=User.model_construct(**row), errors=None)
+        if isinstance(row, dict) else
+        BatchItemResult.model_construct(index=index, status="error", user=None, errors=[BATCH_ERRORS[row]])
+        for index, row in written
+    ]
+    results.sort(key=lambda r: r.index)
+    ok = sum(1 for r in results if r.status == success)
+    return fast_response(BatchResponse.model_construct(results=results, succeeded=ok, failed=len(results) - ok))
+
+@app.post("/api/users:batchCreate", response_model=BatchResponse, tags=["Users"])
+async def batch_create_users(batch: BatchRequest, users: UserRepository = Depends(get_users)):
+    """Create up to BATCH_MAX_ITEMS users in one transaction; results are reported per item."""
+    valid, failed = validate_batch(batch.items, UserCreate)
+    written = await users.create_many(valid) if valid else []
+    created = [row["id"] for _, row in written if isinstance(row, dict)]
+    if created:
+        touch_users(*created)
+    return batch_response(written, failed, "created")
+
+@app.patch("/api/users:batchUpdate", response_model=BatchResponse, tags=["Users"])
+async def batch_update_users(batch: BatchRequest, users: UserRepository = Depends(get_users)):
+    """Partially update up to BATCH_MAX_ITEMS users in one transaction; results are reported per item."""
+    valid, failed = validate_batch(batch.items, UserBatchUpdate)
+    written = await users.update_many(valid) if valid else []
+    updated = [row["id"] for _, row in written if isinstance(row, dict)]
+    if updated:
+        touch_users(*updated)
+    return batch_response(written, failed, "updated")
+
 @app.post("/api/users", response_model=User, status_code=status.HTTP_201_CREATED, tags=["Users"])
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, users: UserRepository = Depends(get_users)):
     """Create a new user."""
-    # Mock implementation
-    return User(
-        id="123",
-        email=user.email,
-        name=user.name,
-        status=user.status,
-        created_at=datetime.now(),
-        updated_at=datetime.now()
-    )
+    created = await users.create(user)
+    touch_users(created["id"])
+    return fast_response(User.model_construct(**created), status_code=status.HTTP_201_CREATED)
 
-@app.get("/api/users/{user_id}", response_model=User, tags=["Users"])
-async def get_user(user_id: str = Path(..., description="User ID")):
-    """Get user by ID."""
-    # Mock: Check if exists
-    if user_id == "999":
+@app.get("/api/users:batchGet", response_model=List[User], tags=["Users"])
+async def batch_get_users(
+    ids: str = Query(..., description="Comma-separated user IDs"),
+    loader: UserLoader = Depends(get_user_loader)
+):
+    """Get several users by ID with one query; every ID must exist."""
+    user_ids = [user_id for user_id in (part.strip() for part in ids.split(",")) if user_id]
+    if not user_ids or len(user_ids) > BATCH_MAX_ITEMS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"message": "User not found", "details": {"id": user_id}}
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid ids", "details": [{"field": "ids", "message": f"Between 1 and {BATCH_MAX_ITEMS} IDs", "code": "invalid_ids"}]}
         )
+    found = await loader.load_many(user_ids)
+    missing = [user_id for user_id, user in zip(user_ids, found) if user is None]
+    if missing:
+        raise user_not_found(missing[0])
+    return FastJSONResponse(content=trusted_users(found))
 
-    return User(
-        id=user_id,
-        email="user@example.com",
-        name="User Name",
-        status=UserStatus.ACTIVE,
-        created_at=datetime.now(),
-        updated_at=datetime.now()
-    )
+@app.get("/api/users/{user_id}", response_model=User, tags=["Users"])
+async def get_user(user_id: str = Path(..., description="User ID"), loader: UserLoader = Depends(get_user_loader)):
+    """Get user by ID (concurrent reads of the same id share one query)."""
+    user = await loader.load(user_id)
+    if user is None:
+        raise user_not_found(user_id)
+    response = fast_response(User.model_construct(**user))
+    set_validators(response, weak_etag(user["id"], user["updated_at"].isoformat()), user["updated_at"])
+    return response
 
 @app.patch("/api/users/{user_id}", response_model=User, tags=["Users"])
-async def update_user(user_id: str, update: UserUpdate):
-    """Partially update user."""
-    # Validate user exists
-    existing = await get_user(user_id)
-
-    # Apply updates
-    update_data = update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(existing, field, value)
-
-    existing.updated_at = datetime.now()
-    return existing
+async def update_user(user_id: str, update: UserUpdate, users: UserRepository = Depends(get_users)):
+    """Partially update user (single UPDATE ... RETURNING, no read-before-write)."""
+    updated = await users.update(user_id, update)
+    if updated is None:
+        raise user_not_found(user_id)
+    touch_users(user_id)
+    return fast_response(User.model_construct(**updated))
 
 @app.delete("/api/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Users"])
-async def delete_user(user_id: str):
-    """Delete user."""
-    await get_user(user_id)  # Verify exists
-    return None
+async def delete_user(user_id: str, users: UserRepository = Depends(get_users)):
+    """Delete user (single DELETE; rowcount tells whether it existed)."""
+    if not await users.delete(user_id):
+        raise user_not_found(user_id)
+    touch_users(user_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 if __name__ == "__main__":
     import uvicorn
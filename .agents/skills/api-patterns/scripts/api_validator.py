@@ -3,10 +3,24 @@
 API Validator - Checks API endpoints for best practices.
 Validates OpenAPI specs, response formats, and common issues.
 """
+import os
 import sys
 import json
 import re
+import argparse
+import hashlib
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import unquote
+
+try:
+    import yaml
+    YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+except ImportError:  # Optional: YAML specs fall back to substring checks
+    yaml = None
 
 # Fix Windows console encoding for Unicode output
 try:
@@ -15,37 +29,522 @@ try:
 except AttributeError:
     pass  # Python < 3.7
 
-def find_api_files(project_path: Path) -> list:
-    """Find API-related files."""
-    patterns = [
-        "**/*api*.ts", "**/*api*.js", "**/*api*.py",
-        "**/routes/*.ts", "**/routes/*.js", "**/routes/*.py",
-        "**/controllers/*.ts", "**/controllers/*.js",
-        "**/endpoints/*.ts", "**/endpoints/*.py",
-        "**/*.openapi.json", "**/*.openapi.yaml",
-        "**/swagger.json", "**/swagger.yaml",
-        "**/openapi.json", "**/openapi.yaml"
+DEFAULT_INCLUDE = (
+    "**/*api*.ts", "**/*api*.js", "**/*api*.py",
+    "**/routes/*.ts", "**/routes/*.js", "**/routes/*.py",
+    "**/controllers/*.ts", "**/controllers/*.js",
+    "**/endpoints/*.ts", "**/endpoints/*.py",
+    "**/*.openapi.json", "**/*.openapi.yaml",
+    "**/swagger.json", "**/swagger.yaml",
+    "**/openapi.json", "**/openapi.yaml",
+    "**/*Endpoints.cs", "**/*Handler.cs", "**/Controllers/*.cs"
+)
+
+DEFAULT_EXCLUDE = ('node_modules', '.git', 'dist', 'build', '__pycache__', 'bin', 'obj')
+
+def compile_patterns(patterns) -> re.Pattern:
+    """Compile glob patterns ('**' = any dirs, '*' = within one segment) into one matcher."""
+    alternatives = []
+    for pattern in patterns:
+        regex = ''
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith('**/', i):
+                regex += '(?:.*/)?'
+                i += 3
+            elif pattern.startswith('**', i):
+                regex += '.*'
+                i += 2
+            elif pattern[i] == '*':
+                regex += '[^/]*'
+                i += 1
+            elif pattern[i] == '?':
+                regex += '[^/]'
+                i += 1
+            else:
+                regex += re.escape(pattern[i])
+                i += 1
+        alternatives.append(regex)
+    return re.compile('|'.join(f'(?:{a})' for a in alternatives))
+
+def find_api_files(project_path: Path, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE) -> list:
+    """Find API-related files in a single walk, pruning excluded directories before descending."""
+    matcher = compile_patterns(include)
+    excluded = set(exclude)
+    files = []
+    stack = [(project_path, '')]
+    
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            rel = prefix + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in excluded:
+                        subdirs.append((Path(entry.path), rel + '/'))
+                elif matcher.fullmatch(rel):
+                    files.append(Path(entry.path))
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+    
+    return files
+
+def find_changed_files(project_path: Path, rev: str, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE) -> list:
+    """API files added or modified since a git revision (plus untracked ones)."""
+    commands = [
+        ['git', '-C', str(project_path), 'diff', '--name-only', '--relative', '--diff-filter=ACMR', rev, '--'],
+        ['git', '-C', str(project_path), 'ls-files', '--others', '--exclude-standard'],
     ]
+    changed = []
+    for cmd in commands:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"git failed: {' '.join(cmd)}")
+        changed.extend(line for line in result.stdout.splitlines() if line)
     
+    matcher = compile_patterns(include)
+    excluded = set(exclude)
     files = []
-    for pattern in patterns:
-        files.extend(project_path.glob(pattern))
+    for rel in sorted(set(changed)):
+        if matcher.fullmatch(rel) and not excluded.intersection(rel.split('/')[:-1]):
+            file_path = project_path / rel
+            if file_path.is_file():
+                files.append(file_path)
+    return files
+
+class SpecError(Exception):
+    """Raised for unresolvable or circular $refs and malformed spec streams."""
+
+class JsonStream:
+    """Buffered reader that decodes one JSON value at a time from a file.
+    
+    Values are decoded by the C json scanner; the buffer only grows to hold
+    the largest single value being decoded, not the whole document.
+    """
+    CHUNK = 1 << 20
+    _WS = re.compile(r'[ \t\n\r]*')
+    
+    def __init__(self, fh):
+        self.fh = fh
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+    
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(max(self.CHUNK, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        while True:
+            self.pos = self._WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+    
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise SpecError(f"expected '{char}' at offset {self.pos}")
+        self.pos += 1
+    
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value ending exactly at the buffer edge may be a truncated number
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+    
+    def members(self):
+        """Yield the keys of the object at the cursor; the caller consumes each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            sep = self.peek()
+            self.pos += 1
+            if sep == '}':
+                return
+            if sep != ',':
+                raise SpecError(f"expected ',' or '}}' at offset {self.pos - 1}")
+
+def read_json_spec_root(file_path: Path) -> tuple:
+    """Return (top-level members except paths, has_paths); path items are decoded and dropped."""
+    root = {}
+    has_paths = False
+    with open(file_path, 'r', encoding='utf-8') as fh:
+        stream = JsonStream(fh)
+        for key in stream.members():
+            if key == 'paths' and stream.peek() == '{':
+                has_paths = True
+                for _ in stream.members():
+                    stream.value()
+            else:
+                root[key] = stream.value()
+    return root, has_paths
+
+def iter_json_spec_paths(file_path: Path):
+    """Yield (path, path_item) pairs from a JSON spec, one at a time."""
+    with open(file_path, 'r', encoding='utf-8') as fh:
+        stream = JsonStream(fh)
+        for key in stream.members():
+            if key == 'paths' and stream.peek() == '{':
+                for path in stream.members():
+                    yield path, stream.value()
+            else:
+                stream.value()
+
+class RefResolver:
+    """Resolve local '#/...' $refs against a spec, memoized, with cycle detection."""
+    
+    def __init__(self, root: dict):
+        self.root = root
+        self._resolved = {}
+        self._depths = {}
+    
+    def _lookup(self, ref: str):
+        if not ref.startswith('#'):
+            raise SpecError(f"external $ref not supported: {ref}")
+        node = self.root
+        for token in ref[1:].split('/')[1:]:
+            token = unquote(token).replace('~1', '/').replace('~0', '~')
+            if isinstance(node, dict) and token in node:
+                node = node[token]
+            elif isinstance(node, list) and token.isdigit() and int(token) < len(node):
+                node = node[int(token)]
+            else:
+                raise SpecError(f"unresolved $ref {ref}")
+        return node
+    
+    def deref(self, node):
+        """Follow a chain of $refs to the first non-reference node."""
+        chain = []
+        while isinstance(node, dict) and isinstance(node.get('$ref'), str):
+            ref = node['$ref']
+            if ref in self._resolved:
+                node = self._resolved[ref]
+                break
+            if ref in chain:
+                node = SpecError(f"circular $ref {' -> '.join(chain + [ref])}")
+                break
+            chain.append(ref)
+            try:
+                node = self._lookup(ref)
+            except SpecError as e:
+                node = e
+                break
+        for ref in chain:
+            self._resolved[ref] = node
+        if isinstance(node, SpecError):
+            raise node
+        return node
+    
+    def ref_depth(self, node, _stack=None) -> float:
+        """Longest chain of nested $refs reachable from a node (inf if recursive)."""
+        if _stack is None:
+            _stack = set()
+        if isinstance(node, list):
+            return max((self.ref_depth(item, _stack) for item in node), default=0)
+        if not isinstance(node, dict):
+            return 0
+        ref = node.get('$ref')
+        if not isinstance(ref, str):
+            return max((self.ref_depth(value, _stack) for value in node.values()), default=0)
+        if ref in self._depths:
+            return self._depths[ref]
+        if ref in _stack:
+            return float('inf')
+        _stack.add(ref)
+        try:
+            depth = 1 + self.ref_depth(self._lookup(ref), _stack)
+        except SpecError:
+            depth = 1
+        _stack.discard(ref)
+        self._depths[ref] = depth
+        return depth
+
+# Performance lint rule pack for specs: thresholds and vocabularies
+PAGINATION_PARAMS = {
+    'page', 'pagesize', 'perpage', 'limit', 'offset', 'cursor', 'after', 'before',
+    'pagetoken', 'nextpagetoken', 'top', 'skip', 'first', 'last', 'maxresults'
+}
+PAGE_SIZE_PARAMS = {'pagesize', 'perpage', 'limit', 'top', 'first', 'last', 'maxresults'}
+LIST_WRAPPER_PROPERTIES = {'items', 'data', 'results', 'records', 'entries', 'values', 'content'}
+CACHE_HEADERS = {'etag', 'cache-control', 'last-modified', 'expires'}
+LARGE_SCHEMA_PROPERTIES = 30
+MAX_REF_DEPTH = 4
+
+SEVERITIES = ('info', 'low', 'medium', 'high')
+
+def make_finding(rule: str, severity: str, operation: str, message: str, line: int = None) -> dict:
+    """A structured lint finding (severity: info, low, medium, high)."""
+    finding = {'rule': rule, 'severity': severity, 'operation': operation, 'message': message}
+    if line is not None:
+        finding['line'] = line
+    return finding
+
+def _normalize_name(name) -> str:
+    return str(name).lower().replace('_', '').replace('-', '')
+
+def _response_schema(response: dict):
+    """Schema of a (dereferenced) response, OpenAPI 3 content or Swagger 2."""
+    content = response.get('content')
+    if isinstance(content, dict):
+        media = [obj for key, obj in content.items() if 'json' in key] or list(content.values())
+        for obj in media:
+            if isinstance(obj, dict) and 'schema' in obj:
+                return obj['schema']
+    return response.get('schema')
+
+def _list_array(schema, resolver: RefResolver):
+    """The array schema a list response returns (top level or common wrapper), else None."""
+    schema = resolver.deref(schema)
+    if not isinstance(schema, dict):
+        return None
+    if schema.get('type') == 'array':
+        return schema
+    properties = schema.get('properties')
+    if isinstance(properties, dict):
+        for name, prop in properties.items():
+            prop = resolver.deref(prop)
+            if name.lower() in LIST_WRAPPER_PROPERTIES and isinstance(prop, dict) and prop.get('type') == 'array':
+                return prop
+    return None
+
+def lint_operation(path: str, method: str, details: dict, parameters: list, resolver: RefResolver) -> list:
+    """Performance findings for one operation (pagination, caching, compression, payload depth)."""
+    findings = []
+    operation = details.get('operationId') or f"{method.upper()} {path}"
+    
+    params = {}
+    for param in parameters:
+        try:
+            param = resolver.deref(param)
+        except SpecError:
+            continue
+        if isinstance(param, dict) and 'name' in param:
+            params[_normalize_name(param['name'])] = param
     
-    # Exclude node_modules, etc.
-    return [f for f in files if not any(x in str(f) for x in ['node_modules', '.git', 'dist', 'build', '__pycache__'])]
+    responses = resolver.deref(details.get('responses')) or {}
+    success = []
+    for code, response in responses.items():
+        if str(code).startswith('2'):
+            response = resolver.deref(response)
+            if isinstance(response, dict):
+                success.append(response)
+    
+    for response in success:
+        schema = _response_schema(response)
+        headers = {str(h).lower() for h in (response.get('headers') or {})}
+        array = _list_array(schema, resolver) if schema is not None else None
+        
+        if method == 'get' and array is not None:
+            paging = PAGINATION_PARAMS.intersection(params)
+            if not paging and 'maxItems' not in array:
+                findings.append(make_finding('list-pagination', 'high', operation,
+                                             "list operation has no pagination parameters and unbounded maxItems"))
+            for name in PAGE_SIZE_PARAMS.intersection(paging):
+                param_schema = resolver.deref(params[name].get('schema', params[name]))
+                if isinstance(param_schema, dict) and 'maximum' not in param_schema:
+                    findings.append(make_finding('page-size-maximum', 'medium', operation,
+                                                 f"page size parameter '{params[name]['name']}' has no maximum"))
+        
+        resolved = resolver.deref(schema) if schema is not None else None
+        property_count = len(resolved.get('properties') or {}) if isinstance(resolved, dict) else 0
+        if (array is not None or property_count >= LARGE_SCHEMA_PROPERTIES) and 'content-encoding' not in headers \
+                and not details.get('x-compression'):
+            findings.append(make_finding('compression', 'low', operation,
+                                         "large response declares no Content-Encoding (compression) header"))
+        
+        depth = resolver.ref_depth(schema) if schema is not None else 0
+        if depth == float('inf'):
+            findings.append(make_finding('ref-depth', 'medium', operation,
+                                         "response schema is recursive through $ref; payload size is unbounded"))
+        elif depth > MAX_REF_DEPTH:
+            findings.append(make_finding('ref-depth', 'medium', operation,
+                                         f"response schema nests {depth} levels of $ref (max {MAX_REF_DEPTH})"))
+    
+    if method == 'get' and success and not any(
+            CACHE_HEADERS.intersection(str(h).lower() for h in (r.get('headers') or {})) for r in success):
+        findings.append(make_finding('http-caching', 'low', operation,
+                                     "GET response declares no ETag, Last-Modified or Cache-Control header"))
+    
+    # Deduplicate findings repeated across several 2xx responses
+    unique = {(f['rule'], f['message']): f for f in findings}
+    return list(unique.values())
+
+_BATCH_MARKER = re.compile(r'batch|bulk')
+_PATH_BOUNDARY = re.compile(r'[/:._-]')
+
+def batch_prefixes(paths: set) -> set:
+    """Every prefix of a path that is followed (at a segment boundary) by 'batch' or 'bulk'.
+    
+    '/users:batchCreate' and '/users/bulk' both yield '/users', so a collection
+    needs one set lookup instead of a scan of every path.
+    """
+    prefixes = set()
+    for other in paths:
+        other = other.lower()
+        markers = [m.start() for m in _BATCH_MARKER.finditer(other)]
+        if not markers:
+            continue
+        cuts = set(markers)
+        cuts.update(m.start() for m in _PATH_BOUNDARY.finditer(other, 0, markers[-1]))
+        prefixes.update(other[:cut].rstrip('/') for cut in cuts)
+    return prefixes
+
+def lint_batch_variants(writes: list, paths: set) -> list:
+    """Collection POSTs with no sibling '/batch', '/bulk' or ':batch...' path."""
+    findings = []
+    prefixes = batch_prefixes(paths)
+    for path, details in writes:
+        base = path.rstrip('/').lower()
+        if 'batch' in base or 'bulk' in base:
+            continue
+        if base not in prefixes:
+            operation = details.get('operationId') or f"POST {path}"
+            severity = 'medium' if details.get('x-hot') else 'info'
+            findings.append(make_finding('batch-variant', severity, operation,
+                                         "write endpoint has no bulk/batch variant"))
+    return findings
+
+def format_finding(finding: dict) -> str:
+    where = f" (line {finding['line']})" if 'line' in finding else ''
+    return f"[!] [{finding['severity']}] {finding['operation']}: {finding['message']}{where} ({finding['rule']})"
+
+def check_spec(root: dict, paths, has_paths: bool, timings: dict = None) -> tuple:
+    """Check a parsed spec; `paths` is an iterable of (path, path_item).
+    
+    Returns (passed, issues, findings) where findings are the structured
+    performance lint results (also listed in issues as warnings). Time spent
+    in the lint rules is added to `timings` (ms) when given.
+    """
+    if timings is None:
+        timings = {}
+    lint_ms = 0.0
+    issues = []
+    passed = []
+    findings = []
+    resolver = RefResolver(root)
+    
+    if 'openapi' in root or 'swagger' in root:
+        passed.append("[OK] OpenAPI version defined")
+    else:
+        issues.append("[X] No OpenAPI version found")
+    
+    info = root.get('info')
+    if isinstance(info, dict):
+        if 'title' in info:
+            passed.append("[OK] API title defined")
+        if 'version' in info:
+            passed.append("[OK] API version defined")
+        if 'description' not in info:
+            issues.append("[!] API description missing")
+    
+    if 'components' in root or 'definitions' in root:
+        passed.append("[OK] Schema components defined")
+    
+    if not has_paths:
+        issues.append("[X] No paths defined")
+        return passed, issues, findings
+    
+    path_count = 0
+    seen_paths = set()
+    writes = []
+    for path, path_item in paths:
+        path_count += 1
+        try:
+            methods = resolver.deref(path_item)
+        except SpecError as e:
+            issues.append(f"[X] {path}: {e}")
+            continue
+        if not isinstance(methods, dict):
+            continue
+        seen_paths.add(path)
+        path_params = methods.get('parameters') or []
+        for method, details in methods.items():
+            if method not in ['get', 'post', 'put', 'patch', 'delete'] or not isinstance(details, dict):
+                continue
+            label = f"{method.upper()} {path}"
+            try:
+                responses = resolver.deref(details.get('responses'))
+                if not responses:
+                    issues.append(f"[X] {label}: No responses defined")
+                else:
+                    for response in responses.values():
+                        resolver.deref(response)
+            except SpecError as e:
+                issues.append(f"[X] {label}: {e}")
+            if 'summary' not in details and 'description' not in details:
+                issues.append(f"[!] {label}: No description")
+            
+            started = time.perf_counter()
+            try:
+                findings.extend(lint_operation(path, method, details, path_params + (details.get('parameters') or []), resolver))
+            except (SpecError, AttributeError, TypeError):
+                pass  # Broken refs / malformed objects are reported above
+            lint_ms += (time.perf_counter() - started) * 1000
+            if method == 'post' and not path.rstrip('/').endswith('}'):
+                writes.append((path, details))
+    
+    started = time.perf_counter()
+    findings.extend(lint_batch_variants(writes, seen_paths))
+    timings['perf-lint'] = lint_ms + (time.perf_counter() - started) * 1000
+    
+    passed.append(f"[OK] {path_count} endpoints defined")
+    if not findings:
+        passed.append("[OK] No performance lint findings")
+    issues.extend(format_finding(f) for f in findings)
+    return passed, issues, findings
 
 def check_openapi_spec(file_path: Path) -> dict:
     """Check OpenAPI/Swagger specification."""
     issues = []
     passed = []
+    findings = []
+    timings = {}
+    started = time.perf_counter()
     
     try:
-        content = file_path.read_text(encoding='utf-8')
-        
         if file_path.suffix == '.json':
-            spec = json.loads(content)
+            root, has_paths = read_json_spec_root(file_path)
+            paths = iter_json_spec_paths(file_path)
+        elif yaml is not None:
+            with open(file_path, 'r', encoding='utf-8') as fh:
+                spec = yaml.load(fh, Loader=YamlLoader) or {}
+            if not isinstance(spec, dict):
+                raise SpecError("top-level YAML value is not a mapping")
+            has_paths = isinstance(spec.get('paths'), dict)
+            paths = list(spec.pop('paths').items()) if has_paths else []
+            root = spec
         else:
-            # Basic YAML check
+            # Basic YAML check (PyYAML not installed)
+            content = file_path.read_text(encoding='utf-8')
             if 'openapi:' in content or 'swagger:' in content:
                 passed.append("[OK] OpenAPI/Swagger version defined")
             else:
@@ -59,153 +558,629 @@ def check_openapi_spec(file_path: Path) -> dict:
             if 'components:' in content or 'definitions:' in content:
                 passed.append("[OK] Schema components defined")
             
-            return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'openapi'}
-        
-        # JSON OpenAPI checks
-        if 'openapi' in spec or 'swagger' in spec:
-            passed.append("[OK] OpenAPI version defined")
-        
-        if 'info' in spec:
-            if 'title' in spec['info']:
-                passed.append("[OK] API title defined")
-            if 'version' in spec['info']:
-                passed.append("[OK] API version defined")
-            if 'description' not in spec['info']:
-                issues.append("[!] API description missing")
-        
-        if 'paths' in spec:
-            path_count = len(spec['paths'])
-            passed.append(f"[OK] {path_count} endpoints defined")
-            
-            # Check each path
-            for path, methods in spec['paths'].items():
-                for method, details in methods.items():
-                    if method in ['get', 'post', 'put', 'patch', 'delete']:
-                        if 'responses' not in details:
-                            issues.append(f"[X] {method.upper()} {path}: No responses defined")
-                        if 'summary' not in details and 'description' not in details:
-                            issues.append(f"[!] {method.upper()} {path}: No description")
+            issues.append("[!] PyYAML not installed; $refs and operations not checked")
+            return {'file': str(file_path), 'passed': passed, 'issues': issues, 'findings': findings, 'timings': timings, 'type': 'openapi'}
+        
+        timings['spec-load'] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        passed, issues, findings = check_spec(root, paths, has_paths, timings)
+        timings['spec-structure'] = (time.perf_counter() - started) * 1000 - timings.get('perf-lint', 0)
         
     except Exception as e:
         issues.append(f"[X] Parse error: {e}")
     
-    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'openapi'}
+    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'findings': findings, 'timings': timings, 'type': 'openapi'}
+
+# Declarative rule table for source files. Each rule passes if any of its
+# patterns occurs; `missing` (if set) is reported when none does. All rules
+# are compiled into one alternation, so adding a rule adds no extra pass.
+# Patterns must not define capturing groups of their own (use (?:...)).
+CODE_RULES = [
+    {
+        'id': 'error_handling',
+        'patterns': [r'try\s*{', r'try:', r'\.catch\(', r'except\s+', r'catch\s*\('],
+        'passed': "[OK] Error handling present",
+        'missing': "[X] No error handling found",
+    },
+    {
+        'id': 'status_codes',
+        'patterns': [
+            r'status\s*\(\s*\d{3}\s*\)', r'statusCode\s*[=:]\s*\d{3}',
+            r'HttpStatus\.', r'status_code\s*=\s*\d{3}',
+            r'\.status\(\d{3}\)', r'res\.status\('
+        ],
+        'passed': "[OK] HTTP status codes used",
+        'missing': "[!] No explicit HTTP status codes",
+    },
+    {
+        'id': 'validation',
+        'patterns': [
+            r'validate', r'schema', r'zod', r'joi', r'yup',
+            r'pydantic', r'@Body\(', r'@Query\('
+        ],
+        'ignore_case': True,
+        'passed': "[OK] Input validation present",
+        'missing': "[!] No input validation detected",
+    },
+    {
+        'id': 'auth',
+        'patterns': [
+            r'auth', r'jwt', r'bearer', r'token',
+            r'middleware', r'guard', r'@Authenticated'
+        ],
+        'ignore_case': True,
+        'passed': "[OK] Authentication/authorization detected",
+    },
+    {
+        'id': 'rate_limiting',
+        'patterns': [r'rateLimit', r'throttle', r'rate.?limit'],
+        'ignore_case': True,
+        'passed': "[OK] Rate limiting present",
+    },
+    {
+        'id': 'logging',
+        'patterns': [r'console\.log', r'logger\.', r'logging\.', r'log\.'],
+        'passed': "[OK] Logging present",
+    },
+]
+
+def _split_first_char(pattern: str):
+    """Split a regex into (leading literal, rest), or (None, pattern) if it has none."""
+    if pattern[:1] == '\\' and len(pattern) > 1 and not pattern[1].isalnum():
+        return pattern[:2], pattern[2:]
+    if pattern[:1].isalnum() or pattern[:1] in '@_#<"\'':
+        return pattern[:1], pattern[1:]
+    return None, pattern
+
+@lru_cache(maxsize=None)
+def compile_rules(rule_ids: frozenset) -> re.Pattern:
+    """Combine the given rules into one regex; branch groups are named '<rule id>__<n>'.
+    
+    Branches are grouped by their leading literal and tagged with an empty
+    marker group, so the regex engine skips ahead to candidate first
+    characters and only tries the branches that can start there.
+    """
+    by_lead = {}
+    fallback = []
+    count = 0
+    for rule in CODE_RULES:
+        if rule['id'] not in rule_ids:
+            continue
+        for pattern in rule['patterns']:
+            first, rest = _split_first_char(pattern)
+            if rule.get('ignore_case'):
+                rest = f'(?i:{rest})' if rest else rest
+                if first is None:
+                    firsts, rest = [None], f'(?i:{pattern})'
+                elif first.isalpha():
+                    firsts = [first.lower(), first.upper()]
+                else:
+                    firsts = [first]
+            else:
+                firsts = [first]
+            for lead in firsts:
+                name = f"{rule['id']}__{count}"
+                count += 1
+                if lead:
+                    by_lead.setdefault(lead, []).append(f'(?P<{name}>){rest}')
+                else:
+                    fallback.append(f'(?P<{name}>{rest})')
+    branches = [f"{lead}(?:{'|'.join(tails)})" for lead, tails in by_lead.items()]
+    return re.compile('|'.join(branches + fallback))
+
+def match_rules(content: str) -> set:
+    """Return the ids of all rules that match, scanning the content once.
+    
+    When a rule matches it is dropped from the alternation and the scan
+    resumes at the same offset, so rules never shadow each other and the
+    text is still traversed a single time.
+    """
+    remaining = frozenset(rule['id'] for rule in CODE_RULES)
+    found = set()
+    pos = 0
+    while remaining:
+        match = compile_rules(remaining).search(content, pos)
+        if not match:
+            break
+        rule_id = match.lastgroup.rsplit('__', 1)[0]
+        found.add(rule_id)
+        remaining = remaining - {rule_id}
+        pos = match.start()
+    return found
 
 def check_api_code(file_path: Path) -> dict:
     """Check API code for common issues."""
     issues = []
     passed = []
+    timings = {}
     
     try:
         content = file_path.read_text(encoding='utf-8')
+        started = time.perf_counter()
+        found = match_rules(content)
+        timings['code-rules'] = (time.perf_counter() - started) * 1000
         
-        # Check for error handling
-        error_patterns = [
-            r'try\s*{', r'try:', r'\.catch\(',
-            r'except\s+', r'catch\s*\('
-        ]
-        has_error_handling = any(re.search(p, content) for p in error_patterns)
-        if has_error_handling:
-            passed.append("[OK] Error handling present")
-        else:
-            issues.append("[X] No error handling found")
+        for rule in CODE_RULES:
+            if rule['id'] in found:
+                passed.append(rule['passed'])
+            elif rule.get('missing'):
+                issues.append(rule['missing'])
         
-        # Check for status codes
-        status_patterns = [
-            r'status\s*\(\s*\d{3}\s*\)', r'statusCode\s*[=:]\s*\d{3}',
-            r'HttpStatus\.', r'status_code\s*=\s*\d{3}',
-            r'\.status\(\d{3}\)', r'res\.status\('
-        ]
-        has_status = any(re.search(p, content) for p in status_patterns)
-        if has_status:
-            passed.append("[OK] HTTP status codes used")
-        else:
-            issues.append("[!] No explicit HTTP status codes")
+    except Exception as e:
+        issues.append(f"[X] Read error: {e}")
+    
+    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'timings': timings, 'type': 'code'}
+
+# ASP.NET minimal API / EF Core hot-path scanner
+_CS_NOISE = re.compile(r'//[^\n]*|/\*.*?\*/|@"(?:[^"]|"")*"|\$?"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+_CS_METHOD = re.compile(
+    r'^[ \t]*(?:(?:public|private|protected|internal|static|async|override|virtual|sealed)\s+)+'
+    r'[\w<>\[\],?.() ]+?\s+(\w+)\s*\(', re.M)
+_CS_GROUP = re.compile(r'(\w+)\s*=\s*[\w.]+\.MapGroup\(\s*"([^"]*)"')
+_CS_MAP = re.compile(r'(\w+)\.Map(Get|Post|Put|Patch|Delete)\(\s*"([^"]*)"\s*,\s*(\w+)?')
+_CS_REQUEST = re.compile(r'\bnew\s+(\w+(?:Query|Command))\s*\(|\b(\w+(?:Query|Command))\s+\w+\s*=\s*new\s*\(')
+_CS_HANDLES = re.compile(r'IRequestHandler<\s*(\w+)')
+_CS_DB_ACCESS = re.compile(r'\b(?:_?\w*[cC]ontext|_?db|_?dbContext)\s*\.\s*(?!Database\b|SaveChanges)[A-Z]\w*')
+_CS_UNBOUNDED = re.compile(r'\.To(?:List|Array|Dictionary|HashSet)Async\s*\(')
+_CS_ENTITY_READ = re.compile(r'\.(?:To(?:List|Array)|(?:First|Single|Last)(?:OrDefault)?)Async\s*\(')
+_CS_SYNC_OVER_ASYNC = re.compile(r'\.Result\b(?!\s*\()|\.Wait\s*\(\s*\)|\.GetAwaiter\s*\(\s*\)\s*\.GetResult\s*\(')
+_CS_SYNC_IO = re.compile(r'\.(?:SaveChanges|ToList|ToArray|First|FirstOrDefault|Single|SingleOrDefault|Count|Any)\s*\(\s*\)')
+
+def _blank(match: re.Match) -> str:
+    return re.sub(r'[^\n]', ' ', match.group(0))
+
+def strip_csharp(content: str, keep_strings: bool = False) -> str:
+    """Blank out comments (and string/char literals) keeping offsets and line numbers."""
+    def repl(match):
+        text = match.group(0)
+        if keep_strings and not text.startswith('/'):
+            return text
+        return _blank(match)
+    return _CS_NOISE.sub(repl, content)
+
+def _enclosing_method(methods: list, pos: int) -> str:
+    name = None
+    for start, method in methods:
+        if start > pos:
+            break
+        name = method
+    return name or '<file>'
+
+def check_csharp_code(file_path: Path) -> dict:
+    """Scan ASP.NET endpoint and handler files for EF Core hot-path anti-patterns."""
+    issues = []
+    passed = []
+    findings = []
+    endpoints = []
+    handles = []
+    timings = {}
+    
+    try:
+        raw = file_path.read_text(encoding='utf-8')
+        started = time.perf_counter()
+        code = strip_csharp(raw)
+        with_strings = strip_csharp(raw, keep_strings=True)
+        methods = [(m.start(), m.group(1)) for m in _CS_METHOD.finditer(code)]
+        owner = file_path.stem
+        handles = _CS_HANDLES.findall(code)
+        is_query_handler = owner.endswith('QueryHandler') or any(h.endswith('Query') for h in handles)
         
-        # Check for validation
-        validation_patterns = [
-            r'validate', r'schema', r'zod', r'joi', r'yup',
-            r'pydantic', r'@Body\(', r'@Query\('
-        ]
-        has_validation = any(re.search(p, content, re.I) for p in validation_patterns)
-        if has_validation:
-            passed.append("[OK] Input validation present")
-        else:
-            issues.append("[!] No input validation detected")
+        def add(rule, severity, pos, message):
+            line = code.count('\n', 0, pos) + 1
+            operation = f"{owner}.{_enclosing_method(methods, pos)}"
+            findings.append(make_finding(rule, severity, operation, message, line))
         
-        # Check for auth middleware
-        auth_patterns = [
-            r'auth', r'jwt', r'bearer', r'token',
-            r'middleware', r'guard', r'@Authenticated'
-        ]
-        has_auth = any(re.search(p, content, re.I) for p in auth_patterns)
-        if has_auth:
-            passed.append("[OK] Authentication/authorization detected")
-        
-        # Check for rate limiting
-        rate_patterns = [r'rateLimit', r'throttle', r'rate.?limit']
-        has_rate = any(re.search(p, content, re.I) for p in rate_patterns)
-        if has_rate:
-            passed.append("[OK] Rate limiting present")
-        
-        # Check for logging
-        log_patterns = [r'console\.log', r'logger\.', r'logging\.', r'log\.']
-        has_logging = any(re.search(p, content) for p in log_patterns)
-        if has_logging:
-            passed.append("[OK] Logging present")
+        # Statement-level checks on query chains
+        start = 0
+        for end in [m.end() for m in re.finditer(';', code)] + [len(code)]:
+            statement = code[start:end]
+            offset = start
+            start = end
+            if not _CS_DB_ACCESS.search(statement) and not _CS_UNBOUNDED.search(statement):
+                continue
+            materialize = _CS_UNBOUNDED.search(statement)
+            if materialize and '.Take(' not in statement and '.Take (' not in statement:
+                add('ef-unbounded-list', 'medium', offset + materialize.start(),
+                    "query materialized with ToListAsync/ToArrayAsync without Take/paging")
+            entity_read = _CS_ENTITY_READ.search(statement)
+            if (is_query_handler and entity_read and _CS_DB_ACCESS.search(statement)
+                    and 'AsNoTracking' not in statement and '.Select(' not in statement):
+                add('ef-tracking-read', 'medium', offset + entity_read.start(),
+                    "read query without AsNoTracking (or a Select projection)")
+            includes = statement.count('.Include(') + statement.count('.ThenInclude(')
+            if includes >= 2 and 'AsSplitQuery' not in statement:
+                add('ef-cartesian-include', 'medium', offset + statement.index('.Include('),
+                    f"{includes} Include/ThenInclude calls in one query without AsSplitQuery (cartesian explosion)")
+        
+        timings['ef-query-rules'] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        
+        # File-level checks
+        for match in _CS_SYNC_OVER_ASYNC.finditer(code):
+            add('sync-over-async', 'high', match.start(), "blocking on a task (.Result/.Wait()/GetResult()) in request path")
+        if 'async ' in code:
+            for match in _CS_SYNC_IO.finditer(code):
+                statement_start = code.rfind(';', 0, match.start()) + 1
+                if _CS_DB_ACCESS.search(code, statement_start, match.start()):
+                    add('sync-db-call', 'high', match.start(),
+                        f"synchronous EF Core call {match.group(0).strip()} inside async code")
+        
+        timings['sync-rules'] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        
+        # Minimal API endpoint map: route -> handler method -> MediatR requests
+        prefixes = {m.group(1): m.group(2) for m in _CS_GROUP.finditer(with_strings)}
+        bodies = {}
+        for i, (pos, name) in enumerate(methods):
+            stop = methods[i + 1][0] if i + 1 < len(methods) else len(code)
+            bodies[name] = code[pos:stop]
+        for match in _CS_MAP.finditer(with_strings):
+            group, verb, route, handler = match.groups()
+            route = (prefixes.get(group, '').rstrip('/') + '/' + route.lstrip('/')).rstrip('/') or '/'
+            endpoints.append({
+                'method': verb.upper(),
+                'route': route,
+                'handler': f"{owner}.{handler}" if handler else f"{owner}.<lambda>",
+                'requests': sorted({a or b for a, b in _CS_REQUEST.findall(bodies.get(handler, ''))}) if handler else [],
+            })
+        
+        timings['endpoint-map'] = (time.perf_counter() - started) * 1000
+        
+        if endpoints:
+            passed.append(f"[OK] {len(endpoints)} endpoints mapped")
+        if not findings:
+            passed.append("[OK] No EF Core hot-path findings")
+        issues.extend(format_finding(f) for f in findings)
         
     except Exception as e:
         issues.append(f"[X] Read error: {e}")
     
-    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'code'}
+    return {
+        'file': str(file_path), 'passed': passed, 'issues': issues, 'findings': findings,
+        'endpoints': endpoints, 'handles': handles, 'timings': timings, 'type': 'csharp'
+    }
 
-def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    project_path = Path(target)
+def print_endpoint_report(endpoints: list, handler_findings: dict):
+    """Per-endpoint summary linking routes to the findings of their handlers."""
+    print("\n[ENDPOINTS] Per-endpoint hot-path report")
+    for endpoint in sorted(endpoints, key=lambda e: (e['route'], e['method'])):
+        related = list(endpoint['findings'])
+        for request in endpoint['requests']:
+            related.extend(handler_findings.get(request, []))
+        via = f" -> {', '.join(endpoint['requests'])}" if endpoint['requests'] else ''
+        if related:
+            worst = max(related, key=lambda f: SEVERITIES.index(f['severity']))['severity']
+            status = f"{len(related)} finding(s), worst: {worst}"
+        else:
+            status = "clean"
+        print(f"   {endpoint['method']:6} {endpoint['route']}{via}: {status}")
+        for finding in related:
+            print(f"      - {format_finding(finding)[4:]}")
+
+def validate_file(file_path: Path) -> dict:
+    """Run the checks appropriate for one file."""
+    started = time.perf_counter()
+    if 'openapi' in file_path.name.lower() or 'swagger' in file_path.name.lower():
+        result = check_openapi_spec(file_path)
+    elif file_path.suffix == '.cs':
+        result = check_csharp_code(file_path)
+    else:
+        result = check_api_code(file_path)
+    result.setdefault('findings', [])
+    result['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+# Bump when check logic outside CODE_RULES changes, to invalidate caches
+RULESET_VERSION = 6
+
+def ruleset_digest() -> str:
+    """Identify the current checks; cached results from other rulesets are stale."""
+    payload = json.dumps([RULESET_VERSION, CODE_RULES], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+class ResultCache:
+    """Persistent per-file results keyed by path, content hash and ruleset.
     
-    print("\n" + "=" * 60)
-    print("  API VALIDATOR - Endpoint Best Practices Check")
-    print("=" * 60 + "\n")
+    A matching mtime/size skips re-reading the file; otherwise the content
+    hash decides whether the stored result is still valid.
+    """
     
-    api_files = find_api_files(project_path)
+    def __init__(self, path: Path):
+        self.path = path
+        self.ruleset = ruleset_digest()
+        self.hits = 0
+        self._hashes = {}
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            self.entries = data['entries'] if data.get('ruleset') == self.ruleset else {}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries = {}
     
-    if not api_files:
-        print("[!] No API files found.")
-        print("   Looking for: routes/, controllers/, api/, openapi.json/yaml")
-        sys.exit(0)
+    @staticmethod
+    def _digest(file_path: Path) -> str:
+        return hashlib.blake2b(file_path.read_bytes(), digest_size=16).hexdigest()
     
-    results = []
-    for file_path in api_files[:15]:  # Limit
-        if 'openapi' in file_path.name.lower() or 'swagger' in file_path.name.lower():
-            result = check_openapi_spec(file_path)
-        else:
-            result = check_api_code(file_path)
-        results.append(result)
+    def get(self, file_path: Path):
+        """Return the cached result for an unchanged file, else None."""
+        key = str(file_path)
+        entry = self.entries.get(key)
+        try:
+            stat = file_path.stat()
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                self.hits += 1
+                return entry['result']
+            digest = self._digest(file_path)
+        except OSError:
+            return None
+        if entry and entry['hash'] == digest:
+            entry['mtime_ns'], entry['size'] = stat.st_mtime_ns, stat.st_size
+            self.hits += 1
+            return entry['result']
+        self._hashes[key] = (digest, stat.st_mtime_ns, stat.st_size)
+        return None
     
-    # Print results
-    total_issues = 0
-    total_passed = 0
+    def put(self, file_path: Path, result: dict):
+        key = str(file_path)
+        try:
+            if key not in self._hashes:
+                stat = file_path.stat()
+                self._hashes[key] = (self._digest(file_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return
+        digest, mtime_ns, size = self._hashes.pop(key)
+        self.entries[key] = {'hash': digest, 'mtime_ns': mtime_ns, 'size': size, 'result': result}
+    
+    def save(self, keep=None):
+        """Write the cache, evicting deleted files and (if given) paths not in `keep`."""
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if (keep is None or key in keep) and Path(key).is_file()
+        }
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({'ruleset': self.ruleset, 'entries': self.entries}), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+def iter_results(files: list, jobs: int, cache: ResultCache = None):
+    """Yield results in input order, validating up to `jobs` files in parallel.
+    
+    At most jobs * 4 files are in flight, so memory stays bounded no matter
+    how many files are checked; each result is yielded as soon as it and all
+    earlier ones are done. Files with a valid cache entry are not re-checked.
+    """
+    if jobs <= 1 or len(files) <= 1:
+        for file_path in files:
+            result = cache.get(file_path) if cache else None
+            if result is None:
+                result = validate_file(file_path)
+                if cache:
+                    cache.put(file_path, result)
+            else:
+                result = dict(result, cached=True)
+            yield result
+        return
+    
+    window = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = {}
+        submitted = 0
+        for i in range(len(files)):
+            while submitted < len(files) and submitted < i + window:
+                file_path = files[submitted]
+                cached = cache.get(file_path) if cache else None
+                pending[submitted] = cached if cached is not None else pool.submit(validate_file, file_path)
+                submitted += 1
+            item = pending.pop(i)
+            if isinstance(item, dict):
+                yield dict(item, cached=True)
+                continue
+            result = item.result()
+            if cache:
+                cache.put(files[i], result)
+            yield result
+
+SARIF_LEVELS = {'high': 'error', 'medium': 'warning', 'low': 'warning', 'info': 'note'}
+
+class TextReporter:
+    """Human-readable decorated output (default)."""
+    
+    def start(self):
+        print("\n" + "=" * 60)
+        print("  API VALIDATOR - Endpoint Best Practices Check")
+        print("=" * 60 + "\n")
+    
+    def note(self, message: str):
+        print(message)
     
-    for result in results:
+    def file(self, result: dict):
         print(f"\n[FILE] {result['file']} [{result['type']}]")
         for item in result['passed']:
             print(f"   {item}")
-            total_passed += 1
         for item in result['issues']:
             print(f"   {item}")
-            if item.startswith("[X]"):
-                total_issues += 1
+        sys.stdout.flush()
     
-    print("\n" + "=" * 60)
-    print(f"[RESULTS] {total_passed} passed, {total_issues} critical issues")
-    print("=" * 60)
+    def finish(self, summary: dict, endpoints: list, handler_findings: dict):
+        if endpoints:
+            print_endpoint_report(endpoints, handler_findings)
+        print("\n" + "=" * 60)
+        print(f"[RESULTS] {summary['passed']} passed, {summary['critical']} critical issues")
+        print("=" * 60)
+        if summary['critical'] == 0:
+            print("[OK] API validation passed")
+        else:
+            print("[X] Fix critical issues before deployment")
+
+class JsonlReporter(TextReporter):
+    """One JSON record per line: each file result as it completes, then endpoints and a summary."""
     
-    if total_issues == 0:
-        print("[OK] API validation passed")
-        sys.exit(0)
+    def start(self):
+        pass
+    
+    def note(self, message: str):
+        print(message, file=sys.stderr)
+    
+    def _emit(self, record: dict):
+        print(json.dumps(record, ensure_ascii=False))
+        sys.stdout.flush()
+    
+    def file(self, result: dict):
+        self._emit({'record': 'file', **result})
+    
+    def finish(self, summary: dict, endpoints: list, handler_findings: dict):
+        for endpoint in endpoints:
+            related = list(endpoint['findings'])
+            for request in endpoint['requests']:
+                related.extend(handler_findings.get(request, []))
+            self._emit({'record': 'endpoint', **endpoint, 'findings': related})
+        self._emit({'record': 'summary', **summary})
+
+class SarifReporter(JsonlReporter):
+    """SARIF 2.1.0 log for code-scanning tools (written once, at the end)."""
+    
+    def __init__(self):
+        self.rules = {}
+        self.results = []
+    
+    def file(self, result: dict):
+        uri = Path(result['file']).as_posix()
+        formatted = set()
+        for finding in result.get('findings', []):
+            formatted.add(format_finding(finding))
+            location = {'physicalLocation': {'artifactLocation': {'uri': uri}}}
+            if 'line' in finding:
+                location['physicalLocation']['region'] = {'startLine': finding['line']}
+            self.rules.setdefault(finding['rule'], finding['severity'])
+            self.results.append({
+                'ruleId': finding['rule'],
+                'level': SARIF_LEVELS.get(finding['severity'], 'warning'),
+                'message': {'text': f"{finding['operation']}: {finding['message']}"},
+                'locations': [location],
+                'properties': {'severity': finding['severity'], 'operation': finding['operation']},
+            })
+        for issue in result['issues']:
+            if issue in formatted:
+                continue
+            self.rules.setdefault(f"{result['type']}-check", None)
+            self.results.append({
+                'ruleId': f"{result['type']}-check",
+                'level': 'error' if issue.startswith('[X]') else 'warning',
+                'message': {'text': issue.split('] ', 1)[-1]},
+                'locations': [{'physicalLocation': {'artifactLocation': {'uri': uri}}}],
+            })
+    
+    def finish(self, summary: dict, endpoints: list, handler_findings: dict):
+        rules = [{'id': rule} for rule in sorted(self.rules)]
+        log = {
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {'name': 'api-validator', 'rules': rules}},
+                'results': self.results,
+                'properties': {'summary': summary},
+            }],
+        }
+        print(json.dumps(log, indent=2, ensure_ascii=False))
+
+REPORTERS = {'text': TextReporter, 'jsonl': JsonlReporter, 'sarif': SarifReporter}
+
+def main():
+    parser = argparse.ArgumentParser(description="API Validator - Endpoint Best Practices Check")
+    parser.add_argument("path", nargs="?", default=".", help="Project path (default: .)")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="Additional file pattern to scan, e.g. '**/handlers/*.go' (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="DIR",
+                        help="Additional directory name to skip, e.g. 'vendor' (repeatable)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Parallel worker processes (default: CPU count)")
+    parser.add_argument("--max-files", type=int, default=None,
+                        help="Validate at most N files (default: all)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="FILE",
+                        help="Reuse results for unchanged files (default file: <path>/.api-validator-cache.json)")
+    parser.add_argument("--changed-since", metavar="REV",
+                        help="Only validate API files changed since a git revision")
+    parser.add_argument("--format", choices=list(REPORTERS), default="text",
+                        help="Output format: text (default), jsonl (streamed records) or sarif")
+    args = parser.parse_args()
+    project_path = Path(args.path)
+    include = DEFAULT_INCLUDE + tuple(args.include)
+    exclude = DEFAULT_EXCLUDE + tuple(args.exclude)
+    reporter = REPORTERS[args.format]()
+    run_started = time.perf_counter()
+    
+    reporter.start()
+    
+    if args.changed_since:
+        try:
+            api_files = find_changed_files(project_path, args.changed_since, include, exclude)
+        except (OSError, RuntimeError) as e:
+            reporter.note(f"[X] Cannot list changes since {args.changed_since}: {e}")
+            sys.exit(2)
+        if not api_files:
+            reporter.note(f"[OK] No API files changed since {args.changed_since}")
     else:
-        print("[X] Fix critical issues before deployment")
-        sys.exit(1)
+        api_files = find_api_files(project_path, include=include, exclude=exclude)
+        if not api_files:
+            reporter.note("[!] No API files found.")
+            reporter.note("   Looking for: routes/, controllers/, api/, openapi.json/yaml")
+    
+    if args.format == 'text' and not api_files:
+        sys.exit(0)
+    
+    if args.max_files is not None and len(api_files) > args.max_files:
+        reporter.note(f"[!] Checking {args.max_files} of {len(api_files)} files (--max-files)")
+        api_files = api_files[:args.max_files]
+    
+    total_issues = 0
+    total_passed = 0
+    file_timings = {}
+    check_timings = {}
+    rule_counts = {}
+    
+    cache = None
+    if args.cache is not None:
+        cache = ResultCache(Path(args.cache) if args.cache else project_path / '.api-validator-cache.json')
+    
+    endpoints = []
+    handler_findings = {}
+    
+    for result in iter_results(api_files, args.jobs, cache):
+        for endpoint in result.get('endpoints', []):
+            own = [f for f in result['findings'] if f['operation'] == endpoint['handler']]
+            endpoints.append(dict(endpoint, findings=own))
+        for request in result.get('handles', []):
+            handler_findings.setdefault(request, []).extend(result['findings'])
+        
+        total_passed += len(result['passed'])
+        total_issues += sum(1 for item in result['issues'] if item.startswith("[X]"))
+        if not result.get('cached'):
+            file_timings[result['file']] = round(result.get('elapsed_ms', 0), 3)
+            for check, ms in result.get('timings', {}).items():
+                check_timings[check] = check_timings.get(check, 0) + ms
+        for finding in result.get('findings', []):
+            rule_counts[finding['rule']] = rule_counts.get(finding['rule'], 0) + 1
+        
+        reporter.file(result)
+    
+    if cache:
+        # A full scan knows every live file; a diff run keeps other entries
+        full_scan = not args.changed_since and args.max_files is None
+        cache.save(keep={str(f) for f in api_files} if full_scan else None)
+        reporter.note(f"\n[CACHE] {cache.hits}/{len(api_files)} files reused from {cache.path}")
+    
+    summary = {
+        'files': len(api_files),
+        'passed': total_passed,
+        'critical': total_issues,
+        'cached': cache.hits if cache else 0,
+        'elapsed_ms': round((time.perf_counter() - run_started) * 1000, 3),
+        'timings': {
+            'files': file_timings,
+            'checks': {check: round(ms, 3) for check, ms in sorted(check_timings.items())},
+        },
+        'findings_by_rule': dict(sorted(rule_counts.items())),
+    }
+    reporter.finish(summary, endpoints, handler_findings)
+    sys.exit(0 if total_issues == 0 else 1)
 
 if __name__ == "__main__":
     main()
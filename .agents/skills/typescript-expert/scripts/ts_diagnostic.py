@@ -4,53 +4,115 @@ TypeScript Project Diagnostic Script
 Analyzes TypeScript projects for configuration, performance, and common issues.
 """
 
-import subprocess
+import argparse
+import asyncio
+import fnmatch
+import hashlib
 import sys
 import os
 import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def run_cmd(cmd: str) -> str:
-    """Run shell command and return output."""
+# Expected duration of each check in seconds; slower runs are flagged
+CHECK_BUDGETS = {
+    "versions": 5,
+    "tsconfig": 1,
+    "tooling": 1,
+    "monorepo": 1,
+    "workspaces": 300,
+    "any_usage": 5,
+    "type_assertions": 5,
+    "source_hotspots": 5,
+    "type_errors": 60,
+    "performance": 60,
+    "trace": 180,
+}
+DEFAULT_TIMEOUT = 300
+# Checks that apply the timeout to each unit of work (one tsc per package) rather than as a whole
+PER_UNIT_TIMEOUT_CHECKS = {"workspaces"}
+
+async def run_cmd(cmd, timeout: float = DEFAULT_TIMEOUT, shell: bool = False, cwd: str = None) -> str:
+    """Run a command without blocking the event loop and return its output."""
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return result.stdout + result.stderr
-    except Exception as e:
+        if shell:
+            proc = await asyncio.create_subprocess_shell(
+                cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=cwd)
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=cwd)
+    except OSError as e:
         return str(e)
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    return stdout.decode("utf-8", errors="replace")
+
+class TscRun:
+    """A single `tsc --noEmit --extendedDiagnostics` run shared by every check that needs it.
+
+    With trace_dir it also writes a --generateTrace trace, so tracing never costs a second type check.
+    """
+
+    def __init__(self, timeout: float, trace_dir: str = None):
+        self.timeout = timeout
+        self.trace_dir = trace_dir
+        self._task = None
+
+    def output(self) -> "asyncio.Task":
+        if self._task is None:
+            cmd = ["npx", "tsc", "--noEmit", "--extendedDiagnostics"]
+            if self.trace_dir:
+                cmd += ["--generateTrace", self.trace_dir]
+            self._task = asyncio.ensure_future(run_cmd(cmd, self.timeout))
+            # Consumers await through asyncio.shield, so the task's own TimeoutError is never
+            # retrieved by them; mark it retrieved to avoid "Task exception was never retrieved"
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
 
-def check_versions():
+async def check_versions(ctx) -> list:
     """Check TypeScript and Node versions."""
-    print("\n📦 Versions:")
-    print("-" * 40)
-    
-    ts_version = run_cmd("npx tsc --version 2>/dev/null").strip()
-    node_version = run_cmd("node -v 2>/dev/null").strip()
-    
-    print(f"  TypeScript: {ts_version or 'Not found'}")
-    print(f"  Node.js: {node_version or 'Not found'}")
-
-def check_tsconfig():
+    lines = ["\n📦 Versions:", "-" * 40]
+
+    ts_version, node_version = await asyncio.gather(
+        run_cmd(["npx", "--no-install", "tsc", "--version"], ctx.timeout),
+        run_cmd(["node", "-v"], ctx.timeout),
+        return_exceptions=True
+    )
+    ts_version = ts_version.strip() if isinstance(ts_version, str) and "Version" in ts_version else ""
+    node_version = node_version.strip() if isinstance(node_version, str) and node_version.startswith("v") else ""
+
+    lines.append(f"  TypeScript: {ts_version or 'Not found'}")
+    lines.append(f"  Node.js: {node_version or 'Not found'}")
+    return lines
+
+async def check_tsconfig(ctx) -> list:
     """Analyze tsconfig.json settings."""
-    print("\n⚙️ TSConfig Analysis:")
-    print("-" * 40)
-    
+    lines = ["\n⚙️ TSConfig Analysis:", "-" * 40]
+
     tsconfig_path = Path("tsconfig.json")
     if not tsconfig_path.exists():
-        print("⚠️ tsconfig.json not found")
-        return
-    
+        lines.append("⚠️ tsconfig.json not found")
+        return lines
+
     try:
         with open(tsconfig_path) as f:
             config = json.load(f)
-        
+
         compiler_opts = config.get("compilerOptions", {})
-        
+
         # Check strict mode
         if compiler_opts.get("strict"):
-            print("✅ Strict mode enabled")
+            lines.append("✅ Strict mode enabled")
         else:
-            print("⚠️ Strict mode NOT enabled")
-        
+            lines.append("⚠️ Strict mode NOT enabled")
+
         # Check important flags
         flags = {
             "noUncheckedIndexedAccess": "Unchecked index access protection",
@@ -58,35 +120,35 @@ def check_tsconfig():
             "skipLibCheck": "Skip lib check (performance)",
             "incremental": "Incremental compilation"
         }
-        
+
         for flag, desc in flags.items():
             status = "✅" if compiler_opts.get(flag) else "⚪"
-            print(f"  {status} {desc}: {compiler_opts.get(flag, 'not set')}")
-        
+            lines.append(f"  {status} {desc}: {compiler_opts.get(flag, 'not set')}")
+
         # Check module settings
-        print(f"\n  Module: {compiler_opts.get('module', 'not set')}")
-        print(f"  Module Resolution: {compiler_opts.get('moduleResolution', 'not set')}")
-        print(f"  Target: {compiler_opts.get('target', 'not set')}")
-        
+        lines.append(f"\n  Module: {compiler_opts.get('module', 'not set')}")
+        lines.append(f"  Module Resolution: {compiler_opts.get('moduleResolution', 'not set')}")
+        lines.append(f"  Target: {compiler_opts.get('target', 'not set')}")
+
     except json.JSONDecodeError:
-        print("❌ Invalid JSON in tsconfig.json")
+        lines.append("❌ Invalid JSON in tsconfig.json")
+    return lines
 
-def check_tooling():
+async def check_tooling(ctx) -> list:
     """Detect TypeScript tooling ecosystem."""
-    print("\n🛠️ Tooling Detection:")
-    print("-" * 40)
-    
+    lines = ["\n🛠️ Tooling Detection:", "-" * 40]
+
     pkg_path = Path("package.json")
     if not pkg_path.exists():
-        print("⚠️ package.json not found")
-        return
-    
+        lines.append("⚠️ package.json not found")
+        return lines
+
     try:
         with open(pkg_path) as f:
             pkg = json.load(f)
-        
+
         all_deps = {**pkg.get("dependencies", {}), **pkg.get("devDependencies", {})}
-        
+
         tools = {
             "biome": "Biome (linter/formatter)",
             "eslint": "ESLint",
@@ -98,106 +160,974 @@ def check_tooling():
             "nx": "Nx (monorepo)",
             "lerna": "Lerna (monorepo)"
         }
-        
+
         for tool, desc in tools.items():
             for dep in all_deps:
                 if tool in dep.lower():
-                    print(f"  ✅ {desc}")
+                    lines.append(f"  ✅ {desc}")
                     break
-                    
+
     except json.JSONDecodeError:
-        print("❌ Invalid JSON in package.json")
+        lines.append("❌ Invalid JSON in package.json")
+    return lines
 
-def check_monorepo():
+async def check_monorepo(ctx) -> list:
     """Check for monorepo configuration."""
-    print("\n📦 Monorepo Check:")
-    print("-" * 40)
-    
+    lines = ["\n📦 Monorepo Check:", "-" * 40]
+
     indicators = [
         ("pnpm-workspace.yaml", "PNPM Workspace"),
         ("lerna.json", "Lerna"),
         ("nx.json", "Nx"),
         ("turbo.json", "Turborepo")
     ]
-    
+
     found = False
     for file, name in indicators:
         if Path(file).exists():
-            print(f"  ✅ {name} detected")
+            lines.append(f"  ✅ {name} detected")
             found = True
-    
-    if not found:
-        print("  ⚪ No monorepo configuration detected")
-
-def check_type_errors():
-    """Run quick type check."""
-    print("\n🔍 Type Check:")
-    print("-" * 40)
-    
-    result = run_cmd("npx tsc --noEmit 2>&1 | head -20")
-    if "error TS" in result:
-        errors = result.count("error TS")
-        print(f"  ❌ {errors}+ type errors found")
-        print(result[:500])
+
+    packages = discover_workspaces(".")
+    if packages:
+        typed = sum(1 for pkg in packages if (Path(pkg) / "tsconfig.json").exists())
+        lines.append(f"  ✅ {len(packages)} workspace packages ({typed} with tsconfig.json)")
+        if not ctx.workspaces:
+            lines.append("  💡 Run with --workspaces to diagnose each package")
+    elif not found:
+        lines.append("  ⚪ No monorepo configuration detected")
+    return lines
+
+# ============ WORKSPACES ============
+WORKSPACE_CACHE_DIR = ".ts-diagnostic"
+WORKSPACE_CACHE_FILE = "workspaces.json"
+NX_PROJECT_DEPTH = 4
+LOCKFILES = ("package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml", "yarn.lock", "bun.lock", "bun.lockb")
+
+def ensure_cache_dir() -> Path:
+    """Create the cache directory with a .gitignore, so diagnostics never dirty the git tree."""
+    cache_dir = Path(WORKSPACE_CACHE_DIR)
+    cache_dir.mkdir(exist_ok=True)
+    gitignore = cache_dir / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("*\n", encoding="utf-8")
+    return cache_dir
+
+def _read_json(path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _pnpm_patterns(path: Path) -> list:
+    """The 'packages:' list of pnpm-workspace.yaml (flat YAML, no parser needed)."""
+    patterns, in_packages = [], False
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.split("#", 1)[0].rstrip()
+        if not stripped:
+            continue
+        if not line[0].isspace():
+            in_packages = stripped.startswith("packages:")
+        elif in_packages and stripped.lstrip().startswith("-"):
+            patterns.append(stripped.lstrip()[1:].strip().strip("'\""))
+    return patterns
+
+def workspace_patterns(root: Path) -> list:
+    """Workspace globs from pnpm, npm/yarn (also used by Turbo), Lerna and Nx config."""
+    patterns = []
+    if (root / "pnpm-workspace.yaml").exists():
+        patterns += _pnpm_patterns(root / "pnpm-workspace.yaml")
+    workspaces = _read_json(root / "package.json").get("workspaces", [])
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages", [])
+    patterns += workspaces
+    patterns += _read_json(root / "lerna.json").get("packages", [])
+    if (root / "nx.json").exists():
+        layout = _read_json(root / "nx.json").get("workspaceLayout", {})
+        patterns += [f"{layout.get('appsDir', 'apps')}/*", f"{layout.get('libsDir', 'libs')}/*"]
+    return patterns
+
+def _nx_projects(root: Path) -> list:
+    """Directories holding an Nx project.json, pruned like the source scan."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        depth = len(Path(dirpath).relative_to(root).parts)
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS] if depth < NX_PROJECT_DEPTH else []
+        if "project.json" in filenames and depth:
+            found.append(Path(dirpath))
+    return found
+
+def discover_workspaces(root: str = ".") -> list:
+    """Package directories (relative to root) declared by the workspace tooling."""
+    root = Path(root)
+    patterns = workspace_patterns(root)
+    include = [p for p in patterns if not p.startswith("!")]
+    exclude = [p[1:] for p in patterns if p.startswith("!")]
+
+    candidates = set()
+    for pattern in include:
+        for match in root.glob(pattern.rstrip("/")):
+            if match.is_dir() and not SKIP_DIRS.intersection(match.relative_to(root).parts):
+                candidates.add(match)
+    if (root / "nx.json").exists():
+        candidates.update(_nx_projects(root))
+
+    packages = []
+    for path in candidates:
+        rel = path.relative_to(root).as_posix()
+        if any(fnmatch.fnmatch(rel, pattern.rstrip("/")) for pattern in exclude):
+            continue
+        if (path / "package.json").exists() or (path / "project.json").exists():
+            packages.append(rel)
+    return sorted(packages)
+
+def _stat_digest(digest, paths):
+    """Feed path, size and mtime of each existing file into digest."""
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+
+def toolchain_files(directory) -> list:
+    """Installed compiler and @types manifests; a version change can change every result."""
+    modules = Path(directory) / "node_modules"
+    return [modules / "typescript" / "package.json", *sorted(modules.glob("@types/*/package.json"))]
+
+def tsconfig_chain(tsconfig: Path) -> list:
+    """A tsconfig and every config it extends by relative path (e.g. ../../tsconfig.base.json)."""
+    chain, pending = [], [tsconfig]
+    while pending:
+        path = pending.pop().resolve()
+        if path in chain or not path.is_file():
+            continue
+        chain.append(path)
+        extends = _read_json(path).get("extends") or []
+        for ref in [extends] if isinstance(extends, str) else extends:
+            if isinstance(ref, str) and ref.startswith("."):
+                target = path.parent / ref
+                pending.append(target if target.suffix == ".json" else target.with_name(target.name + ".json"))
+    return chain
+
+def package_fingerprint(pkg: str, nested: set) -> str:
+    """Hash of path, size and mtime of every source and config file in a package, the configs it
+    extends from outside the package and its own installed toolchain."""
+    digest = hashlib.blake2b(digest_size=16)
+    for dirpath, dirnames, filenames in os.walk(pkg):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS
+                             and os.path.join(dirpath, d) not in nested)
+        _stat_digest(digest, [os.path.join(dirpath, name) for name in sorted(filenames)
+                              if name.endswith(SOURCE_EXTENSIONS) or name.endswith(".json")])
+    _stat_digest(digest, [*tsconfig_chain(Path(pkg) / "tsconfig.json"), *toolchain_files(pkg)])
+    return digest.hexdigest()
+
+def root_fingerprint(root: str = ".") -> str:
+    """Hash of the workspace-wide inputs every package shares: root tsconfigs, manifest, lockfile
+    and the hoisted toolchain."""
+    root = Path(root)
+    digest = hashlib.blake2b(digest_size=16)
+    _stat_digest(digest, [*sorted(root.glob("tsconfig*.json")), root / "package.json",
+                          *(root / name for name in LOCKFILES), *toolchain_files(root)])
+    return digest.hexdigest()
+
+def workspace_fingerprints(packages: list) -> dict:
+    """Per-package fingerprints that also change when a workspace dependency changes."""
+    names, deps = {}, {}
+    for pkg in packages:
+        manifest = _read_json(Path(pkg) / "package.json")
+        names[manifest.get("name") or pkg] = pkg
+        deps[pkg] = {**manifest.get("dependencies", {}), **manifest.get("devDependencies", {}),
+                     **manifest.get("peerDependencies", {})}
+    own = {pkg: package_fingerprint(pkg, {p for p in packages if p != pkg}) for pkg in packages}
+    shared = root_fingerprint()
+
+    combined = {}
+    def resolve(pkg, seen):
+        if pkg in combined:
+            return combined[pkg]
+        parts = [shared, own[pkg]]
+        for dep in sorted(deps[pkg]):
+            target = names.get(dep)
+            if target and target not in seen:
+                parts.append(resolve(target, seen | {target}))
+        combined[pkg] = hashlib.blake2b("".join(parts).encode(), digest_size=16).hexdigest()
+        return combined[pkg]
+    for pkg in packages:
+        resolve(pkg, {pkg})
+    return combined
+
+async def diagnose_package(pkg: str, ctx, limit: asyncio.Semaphore) -> dict:
+    """Type-check and scan one package; tsc keeps a per-package tsbuildinfo between runs."""
+    buildinfo = Path(WORKSPACE_CACHE_DIR).resolve() / (re.sub(r"[^\w.-]+", "_", pkg) + ".tsbuildinfo")
+    src = os.path.join(pkg, "src")
+    loop = asyncio.get_running_loop()
+    async with limit:
+        started = time.perf_counter()
+        try:
+            output, scans = await asyncio.gather(
+                run_cmd(["npx", "tsc", "--noEmit", "--extendedDiagnostics", "--incremental",
+                         "--tsBuildInfoFile", str(buildinfo)], ctx.timeout, cwd=pkg),
+                loop.run_in_executor(None, scan_tree, src if os.path.isdir(src) else pkg, 1),
+            )
+        except asyncio.TimeoutError:
+            return {"status": "timed out", "errors": 0, "any": 0, "as": 0, "files": 0, "check_time": None,
+                    "elapsed": round(time.perf_counter() - started, 2)}
+        elapsed = time.perf_counter() - started
+    metrics = parse_diagnostics(output)
+    return {
+        "status": "checked" if "check_time" in metrics else "tsc failed",
+        "errors": sum(1 for line in output.splitlines() if "error TS" in line),
+        "any": sum(r["any"] for r in scans),
+        "as": sum(r["as"] for r in scans),
+        "files": metrics.get("files", len(scans)),
+        "check_time": metrics.get("check_time"),
+        "elapsed": round(elapsed, 2),
+    }
+
+async def check_workspaces(ctx) -> list:
+    """Diagnose every workspace package concurrently, skipping packages unchanged since the last run."""
+    if not ctx.workspaces:
+        return []
+    lines = ["\n🗂️ Workspace Packages:", "-" * 40]
+
+    packages = [pkg for pkg in discover_workspaces(".") if (Path(pkg) / "tsconfig.json").exists()]
+    if not packages:
+        lines.append("  ⚪ No TypeScript workspace packages found")
+        return lines
+
+    loop = asyncio.get_running_loop()
+    fingerprints = await loop.run_in_executor(None, workspace_fingerprints, packages)
+    cache_path = Path(WORKSPACE_CACHE_DIR) / WORKSPACE_CACHE_FILE
+    cache = {} if ctx.force else _read_json(cache_path)
+
+    limit = asyncio.Semaphore(ctx.jobs)
+    pending = {}
+    results = {}
+    for pkg in packages:
+        cached = cache.get(pkg)
+        if cached and cached.get("fingerprint") == fingerprints[pkg] and cached["result"]["status"] == "checked":
+            results[pkg] = {**cached["result"], "status": "unchanged"}
+        else:
+            pending[pkg] = asyncio.ensure_future(diagnose_package(pkg, ctx, limit))
+    ensure_cache_dir()
+    try:
+        for pkg, task in pending.items():
+            results[pkg] = await task
+    finally:
+        # Keep whatever finished even if the run is interrupted, so the next run starts warm
+        for pkg, task in pending.items():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                cache[pkg] = {"fingerprint": fingerprints[pkg], "result": task.result()}
+            else:
+                task.cancel()
+        cache_path.write_text(json.dumps({pkg: cache[pkg] for pkg in packages if pkg in cache}, indent=1))
+
+    width = max(len(pkg) for pkg in packages)
+    lines.append(f"  {'package':<{width}}  {'status':<10} {'errors':>6} {'any':>5} {'as':>5} {'files':>6} {'check':>7}")
+    for pkg in packages:
+        r = results[pkg]
+        check = f"{r['check_time']:.2f}s" if r.get("check_time") is not None else "-"
+        icon = "❌" if r["errors"] or r["status"] in ("tsc failed", "timed out") else "✅"
+        lines.append(f"{icon} {pkg:<{width}}  {r['status']:<10} {r['errors']:>6} {r['any']:>5} {r['as']:>5}"
+                     f" {r['files']:>6} {check:>7}")
+    lines.append(f"\n  {len(pending)} checked, {len(packages) - len(pending)} unchanged"
+                 f" (jobs: {ctx.jobs}, cache: {cache_path})")
+    return lines
+
+async def check_type_errors(ctx) -> list:
+    """Report type errors from the shared tsc run."""
+    lines = ["\n🔍 Type Check:", "-" * 40]
+
+    result = await asyncio.shield(ctx.tsc.output())
+    error_lines = [line for line in result.splitlines() if "error TS" in line]
+    if error_lines:
+        lines.append(f"  ❌ {len(error_lines)} type errors found")
+        lines.append("\n".join(error_lines)[:500])
+    elif "Check time" not in result:
+        lines.append("  ⚠️ Could not run tsc")
+        lines.append(result.strip()[:500])
     else:
-        print("  ✅ No type errors")
+        lines.append("  ✅ No type errors")
+    return lines
+
+# In-process TS/TSX scanner: comments and strings are skipped, so only real code counts
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".mts", ".cts")
+SKIP_DIRS = {"node_modules", ".git", ".next", "dist", "build", "coverage", ".turbo"}
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:\\.|[^'\\\n])*'?|"(?:\\.|[^"\\\n])*"?|`(?:\\.|[^\\`])*`?)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<op>!==|!=|\S)
+""", re.S | re.X)
+_REGEX_LITERAL = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+_TS_IGNORE = re.compile(r"@ts-ignore\b")
+# Tokens after which '/' starts a regex literal and '!' is a prefix negation
+_EXPRESSION_START = {"return", "typeof", "case", "in", "of", "yield", "await", "throw",
+                     "delete", "void", "new", "else", "do", "instanceof"}
+_POSTFIX_OK = {")", "]"}
+# TSX: '<' in expression position opens an element unless it is a generic arrow (<T,>, <T extends U>)
+# or, after ':', a generic signature type (<T>(x: T) => T). Element text is prose, not code.
+_JSX_START = re.compile(r"[A-Za-z_$>]")
+_JSX_GENERIC = re.compile(r"[A-Za-z_$][\w$]*\s*(?:,|=|extends\b)")
+_JSX_GENERIC_SIGNATURE = re.compile(r"[A-Za-z_$][\w$]*\s*>\s*\(")
+_JSX_CHILD_BREAK = re.compile(r"[{<]")
+_JSX_TAG_PART = re.compile(r"""\s+|/>|>|\{|<|"[^"]*"?|'[^']*'?|[^\s/>{<"']+|/""")
+MAX_SAMPLES = 5
+
+def scan_source(text: str, jsx: bool = False) -> dict:
+    """Count ': any', 'as' assertions, non-null '!' and @ts-ignore in one pass.
+
+    With jsx (.tsx files) element text and attribute strings are skipped, so "Order Confirmed!"
+    or "continue as a guest" never count; code inside {...} is still scanned.
+    """
+    counts = {"any": 0, "as": 0, "non_null": 0, "ts_ignore": 0}
+    any_lines = []
+    prev = None          # previous significant token
+    prev_kind = None
+    prev_end = -1
+    module_clause = False  # inside `import {...} from` / `export * as ns`
+    frames = []  # JSX nesting: ["tag"], ["children"] or ["expr", open braces inside the {...}]
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        mode = frames[-1][0] if frames else None
+        if mode == "children":
+            brk = _JSX_CHILD_BREAK.search(text, pos)
+            if brk is None:
+                break
+            pos = brk.end()
+            if brk.group() == "{":
+                frames.append(["expr", 0])
+                prev, prev_kind, prev_end = "{", "op", pos
+                continue
+            if not text.startswith("/", pos):
+                frames.append(["tag"])
+                continue
+            close = text.find(">", pos)  # Closing tag or fragment
+            pos = length if close < 0 else close + 1
+            frames.pop()
+        elif mode == "tag":
+            part = _JSX_TAG_PART.match(text, pos).group()
+            pos += len(part)
+            if part == ">":
+                frames[-1] = ["children"]
+                continue
+            if part == "{":
+                frames.append(["expr", 0])
+                prev, prev_kind, prev_end = "{", "op", pos
+                continue
+            if part == "<":
+                frames.append(["tag"])
+                continue
+            if part != "/>":
+                continue
+            frames.pop()
+        if mode in ("children", "tag"):
+            if not frames or frames[-1][0] == "expr":  # Outermost element closed: it is a value
+                prev, prev_kind, prev_end = "</>", "string", pos
+            continue
+
+        match = _TOKEN.match(text, pos)
+        kind = match.lastgroup
+        token = match.group(kind)
+        start = pos
+        pos = match.end()
+
+        if kind == "ws":
+            continue
+        if kind == "comment":
+            counts["ts_ignore"] += len(_TS_IGNORE.findall(token))
+            continue
+        if kind == "string":
+            if module_clause and prev == "from":
+                module_clause = False
+            prev, prev_kind, prev_end = token, kind, pos
+            continue
+
+        expression_position = (prev is None or (prev_kind == "op" and prev not in _POSTFIX_OK)
+                               or prev in _EXPRESSION_START)
+        if token == "/" and expression_position:
+            regex = _REGEX_LITERAL.match(text, start)
+            if regex:
+                pos = regex.end()
+                prev, prev_kind, prev_end = "/re/", "string", pos
+                continue
+        if jsx and token == "<" and expression_position and _JSX_START.match(text, pos) \
+                and not _JSX_GENERIC.match(text, pos) \
+                and not (prev == ":" and _JSX_GENERIC_SIGNATURE.match(text, pos)):
+            frames.append(["tag"])
+            continue
+        if frames and token in "{}":
+            if token == "{":
+                frames[-1][1] += 1
+            elif frames[-1][1]:
+                frames[-1][1] -= 1
+            else:  # End of a JSX {...} expression
+                frames.pop()
+                continue
+
+        if kind == "ident":
+            if token in ("import", "export"):
+                following = _TOKEN.match(text, pos)
+                while following and following.lastgroup in ("ws", "comment"):
+                    following = _TOKEN.match(text, following.end())
+                nxt = following.group(following.lastgroup) if following else ""
+                module_clause = nxt in ("{", "*", "type")
+            elif token == "any" and prev == ":":
+                counts["any"] += 1
+                if len(any_lines) < MAX_SAMPLES:
+                    any_lines.append(text.count("\n", 0, start) + 1)
+            elif token == "as" and prev_kind in ("ident", "string", "number", "op") and not module_clause \
+                    and prev != "*":
+                following = _TOKEN.match(text, pos)
+                while following and following.lastgroup == "ws":
+                    following = _TOKEN.match(text, following.end())
+                if not following or following.group(following.lastgroup) != "const":
+                    counts["as"] += 1
+        elif token == "!" and prev_end == start and (
+                (prev_kind == "ident" and prev not in _EXPRESSION_START) or prev in _POSTFIX_OK):
+            counts["non_null"] += 1
+        elif token == ";":
+            module_clause = False
+
+        prev, prev_kind, prev_end = token, kind, pos
 
-def check_any_usage():
+    counts["any_lines"] = any_lines
+    return counts
+
+# Scanner regression cases: (source, is TSX, expected counts)
+SCAN_CASES = [
+    ("const n = user!.name as string;", False, {"non_null": 1, "as": 1}),
+    ("import { a as b } from 'x'; const c = <const>[1];", False, {"as": 0}),
+    ("if (a < b && c > d) { e!.f(); }", False, {"non_null": 1}),
+    ("const t = <h1 className=\"x\">Order Confirmed!</h1>;", True, {"non_null": 0}),
+    ("return <p>Only {item!.count} left!</p>;", True, {"non_null": 1}),
+    ("return <p>Sign in or continue as a guest.</p>;", True, {"as": 0}),
+    ("<div style={{ top: 0 } as Style} aria-label='Continue as guest' />", True, {"as": 1}),
+    ("const el = <>{xs.map(x => <li key={x}>{x as string}!</li>)}</>; y!.z;", True, {"as": 1, "non_null": 1}),
+    ("const id = <T,>(x: T) => x!; const f: <T>(x: T) => T = g;", True, {"non_null": 1}),
+]
+
+def self_check() -> list:
+    """Failures of scan_source against SCAN_CASES."""
+    failures = []
+    for source, jsx, expected in SCAN_CASES:
+        counts = scan_source(source, jsx=jsx)
+        wrong = {key: counts[key] for key, value in expected.items() if counts[key] != value}
+        if wrong:
+            failures.append(f"{source!r}: expected {expected}, got {wrong}")
+    return failures
+
+def scan_file(path: str) -> dict:
+    """Scan one file; unreadable files count as empty."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        text = ""
+    result = scan_source(text, jsx=path.endswith(".tsx"))
+    result["file"] = path
+    if result["any_lines"]:
+        lines = text.splitlines()
+        result["any_samples"] = [f"{path}:{n}: {lines[n - 1].strip()}" for n in result["any_lines"]]
+    return result
+
+def find_sources(root: str = "src") -> list:
+    """All TS/TSX files under root, pruning dependency and build directories."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        files.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                     if name.endswith(SOURCE_EXTENSIONS))
+    return files
+
+def scan_tree(root: str = "src", jobs: int = None) -> list:
+    """Scan every source file under root, in parallel across processes for large trees."""
+    files = find_sources(root)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(files) < 64:
+        return [scan_file(path) for path in files]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(scan_file, files, chunksize=32))
+
+class SourceScan:
+    """One scan of src/ shared by the 'any', assertion and per-file checks."""
+
+    def __init__(self):
+        self._task = None
+
+    def results(self) -> "asyncio.Future":
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._task = loop.run_in_executor(None, scan_tree, "src")
+        return self._task
+
+async def check_any_usage(ctx) -> list:
     """Check for any type usage."""
-    print("\n⚠️ 'any' Type Usage:")
-    print("-" * 40)
-    
-    result = run_cmd("grep -r ': any' --include='*.ts' --include='*.tsx' src/ 2>/dev/null | wc -l")
-    count = result.strip()
-    if count and count != "0":
-        print(f"  ⚠️ Found {count} occurrences of ': any'")
-        sample = run_cmd("grep -rn ': any' --include='*.ts' --include='*.tsx' src/ 2>/dev/null | head -5")
-        if sample:
-            print(sample)
+    lines = ["\n⚠️ 'any' Type Usage:", "-" * 40]
+
+    results = await asyncio.shield(ctx.sources.results())
+    count = sum(r["any"] for r in results)
+    if count:
+        lines.append(f"  ⚠️ Found {count} occurrences of ': any'")
+        samples = [s for r in results for s in r.get("any_samples", [])][:MAX_SAMPLES]
+        lines.extend(samples)
     else:
-        print("  ✅ No explicit 'any' types found")
+        lines.append("  ✅ No explicit 'any' types found")
+    return lines
 
-def check_type_assertions():
+async def check_type_assertions(ctx) -> list:
     """Check for type assertions."""
-    print("\n⚠️ Type Assertions (as):")
-    print("-" * 40)
-    
-    result = run_cmd("grep -r ' as ' --include='*.ts' --include='*.tsx' src/ 2>/dev/null | grep -v 'import' | wc -l")
-    count = result.strip()
-    if count and count != "0":
-        print(f"  ⚠️ Found {count} type assertions")
-    else:
-        print("  ✅ No type assertions found")
-
-def check_performance():
-    """Check type checking performance."""
-    print("\n⏱️ Type Check Performance:")
-    print("-" * 40)
-    
-    result = run_cmd("npx tsc --extendedDiagnostics --noEmit 2>&1 | grep -E 'Check time|Files:|Lines:|Nodes:'")
-    if result.strip():
-        for line in result.strip().split('\n'):
-            print(f"  {line}")
+    lines = ["\n⚠️ Type Assertions (as):", "-" * 40]
+
+    results = await asyncio.shield(ctx.sources.results())
+    count = sum(r["as"] for r in results)
+    non_null = sum(r["non_null"] for r in results)
+    ignores = sum(r["ts_ignore"] for r in results)
+    if count:
+        lines.append(f"  ⚠️ Found {count} type assertions (excluding 'as const')")
     else:
-        print("  ⚠️ Could not measure performance")
+        lines.append("  ✅ No type assertions found")
+    lines.append(f"  {'⚠️' if non_null else '✅'} Non-null assertions (!): {non_null}")
+    lines.append(f"  {'⚠️' if ignores else '✅'} @ts-ignore comments: {ignores}")
+    return lines
+
+async def check_source_hotspots(ctx) -> list:
+    """Per-file breakdown of type-safety escapes."""
+    lines = ["\n📄 Type Safety by File:", "-" * 40]
+
+    results = await asyncio.shield(ctx.sources.results())
+    keys = ("any", "as", "non_null", "ts_ignore")
+    flagged = [r for r in results if any(r[k] for k in keys)]
+    if not flagged:
+        lines.append(f"  ✅ {len(results)} files scanned, nothing to report")
+        return lines
+    flagged.sort(key=lambda r: (-sum(r[k] for k in keys), r["file"]))
+    lines.append(f"  {'any':>5} {'as':>5} {'!':>5} {'ign':>5}  file ({len(flagged)} of {len(results)} files)")
+    for r in flagged[:20]:
+        lines.append(f"  {r['any']:>5} {r['as']:>5} {r['non_null']:>5} {r['ts_ignore']:>5}  {r['file']}")
+    if len(flagged) > 20:
+        lines.append(f"  ... {len(flagged) - 20} more files")
+    return lines
+
+# tsc --extendedDiagnostics lines look like "Check time:   1.23s" / "Memory used:  312345K"
+_DIAGNOSTIC_LINE = re.compile(r"^([A-Za-z][\w/ .-]*?):\s+([\d.]+)([sK]?)\s*$")
+# Metrics compared against history; for all of them higher is worse
+TREND_METRICS = ("check_time", "bind_time", "parse_time", "emit_time", "i_o_read_time",
+                 "program_time", "total_time", "memory_used", "files", "types", "instantiations")
+PERFORMANCE_LABELS = {
+    "files": "Files",
+    "lines_of_typescript": "Lines of TypeScript",
+    "types": "Types",
+    "instantiations": "Instantiations",
+    "memory_used": "Memory used",
+    "i_o_read_time": "I/O read time",
+    "parse_time": "Parse time",
+    "bind_time": "Bind time",
+    "check_time": "Check time",
+    "emit_time": "Emit time",
+    "total_time": "Total time",
+}
+MIN_TIME_DELTA = 0.1  # seconds; smaller swings are noise
+DEFAULT_HISTORY = os.path.join(WORKSPACE_CACHE_DIR, "history.jsonl")
+DEFAULT_THRESHOLD = 10.0
+
+def parse_diagnostics(output: str) -> dict:
+    """Parse every metric from tsc --extendedDiagnostics: times in s, memory in K."""
+    metrics = {}
+    for line in output.splitlines():
+        match = _DIAGNOSTIC_LINE.match(line.strip())
+        if not match:
+            continue
+        name, value, unit = match.groups()
+        key = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+        metrics[key] = float(value) if unit == "s" or "." in value else int(value)
+    return metrics
+
+def format_metric(key: str, value) -> str:
+    if key.endswith("_time"):
+        return f"{value:.2f}s"
+    if key == "memory_used":
+        return f"{value / 1024:.0f}MB"
+    return f"{value:,}"
+
+async def git_revision(timeout: float) -> dict:
+    """Current commit and whether the working tree has uncommitted changes."""
+    commit, status = await asyncio.gather(
+        run_cmd(["git", "rev-parse", "HEAD"], timeout),
+        run_cmd(["git", "status", "--porcelain", "--untracked-files=no"], timeout),
+    )
+    commit = commit.strip()
+    if not re.fullmatch(r"[0-9a-f]{40}", commit):
+        return {"commit": None, "dirty": False}
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+def load_history(path: str) -> list:
+    """Read history records, oldest first; corrupt lines are skipped."""
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+def append_history(path: str, record: dict):
+    if Path(path).parent == Path(WORKSPACE_CACHE_DIR):
+        ensure_cache_dir()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+def find_baseline(records: list, revision: dict, ref: str, traced: bool = False):
+    """Latest record for ref (a commit prefix), or for the latest other commit.
+
+    Tracing slows tsc down, so traced and untraced runs are only compared with their own kind.
+    """
+    for record in reversed(records):
+        if record.get("traced", False) != traced:
+            continue
+        commit = record.get("commit") or ""
+        if ref != "previous":
+            if commit.startswith(ref):
+                return record
+        elif commit and commit != revision["commit"]:
+            return record
+    return None
+
+def compare_metrics(current: dict, baseline: dict, threshold: float) -> list:
+    """(key, old, new, percent change) for every trend metric that grew past threshold."""
+    regressions = []
+    for key in TREND_METRICS:
+        old, new = baseline.get(key), current.get(key)
+        if not old or new is None:
+            continue
+        if key.endswith("_time") and new - old < MIN_TIME_DELTA:
+            continue
+        change = (new - old) / old * 100
+        if change > threshold:
+            regressions.append((key, old, new, change))
+    return regressions
+
+async def check_performance(ctx) -> list:
+    """Check type checking performance from the shared tsc run and track it over time."""
+    lines = ["\n⏱️ Type Check Performance:", "-" * 40]
+
+    result, revision = await asyncio.gather(asyncio.shield(ctx.tsc.output()),
+                                            git_revision(ctx.timeout))
+    metrics = parse_diagnostics(result)
+    if "check_time" not in metrics:
+        lines.append("  ⚠️ Could not measure performance")
+        return lines
+
+    for key, label in PERFORMANCE_LABELS.items():
+        if key in metrics:
+            lines.append(f"  {label + ':':<22}{format_metric(key, metrics[key]):>12}")
+
+    if ctx.history:
+        records = load_history(ctx.history)
+        if ctx.compare:
+            baseline = find_baseline(records, revision, ctx.compare, traced=bool(ctx.tsc.trace_dir))
+            if baseline is None:
+                lines.append(f"\n  ⚪ No history entry to compare against in {ctx.history}")
+            else:
+                lines.append(f"\n  Compared with {baseline['commit'][:10]} ({baseline.get('timestamp', '?')}),"
+                             f" threshold {ctx.threshold:g}%:")
+                regressions = compare_metrics(metrics, baseline["metrics"], ctx.threshold)
+                for key, old, new, change in regressions:
+                    lines.append(f"  ❌ {key}: {format_metric(key, old)} -> {format_metric(key, new)}"
+                                 f" (+{change:.1f}%)")
+                if not regressions:
+                    lines.append("  ✅ No regressions")
+                ctx.regressions.extend(regressions)
+        if revision["commit"]:
+            append_history(ctx.history, {
+                **revision,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "metrics": metrics,
+                **({"traced": True} if ctx.tsc.trace_dir else {}),
+            })
+            lines.append(f"\n  Recorded in {ctx.history} ({len(records) + 1} entries)")
+        else:
+            lines.append("\n  ⚪ Not a git checkout; history not recorded")
+    return lines
+
+# tsc --generateTrace analysis: trace.json is a Chrome trace-event array, types.json an
+# array of every type the checker created. Both are streamed, never loaded whole.
+TRACE_CHUNK = 1 << 20
+DEFAULT_TRACE_DIR = ".ts-trace"
+TRACE_TOP = 10
+FILE_PHASES = {"createSourceFile": "parse", "bindSourceFile": "bind", "checkSourceFile": "check"}
+_LEADING_TRIVIA = re.compile(r"(?:\s+|//[^\n]*|/\*.*?\*/)*", re.S)
+
+def iter_json_array(path: str):
+    """Yield the elements of a top-level JSON array while reading it in fixed-size chunks."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        buf, pos = "", 0
+        while True:
+            chunk = f.read(TRACE_CHUNK)
+            buf, pos = buf[pos:] + chunk, 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,[":
+                    pos += 1
+                if pos >= len(buf) or buf[pos] == "]":
+                    break
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    break  # element continues in the next chunk (or the trace was cut short)
+                yield value
+                pos = end
+            if not chunk:
+                return
+
+def trace_files(trace_dir: str) -> list:
+    """(trace.json, types.json) pairs; `tsc -b` writes one pair per project plus legend.json."""
+    legend = Path(trace_dir) / "legend.json"
+    if legend.exists():
+        with open(legend) as f:
+            return [(entry["tracePath"], entry.get("typesPath")) for entry in json.load(f)]
+    trace, types = Path(trace_dir) / "trace.json", Path(trace_dir) / "types.json"
+    return [(str(trace), str(types) if types.exists() else None)] if trace.exists() else []
+
+def analyze_trace_events(path: str, files: dict, expressions: dict):
+    """Accumulate per-file phase time and per-expression check time (microseconds)."""
+    open_spans = {}  # (pid, tid) -> stack of B events awaiting their E
+    for event in iter_json_array(path):
+        phase = event.get("ph")
+        if phase == "B":
+            open_spans.setdefault((event.get("pid"), event.get("tid")), []).append(event)
+            continue
+        if phase == "E":
+            stack = open_spans.get((event.get("pid"), event.get("tid")))
+            if not stack:
+                continue
+            begin = stack.pop()
+            name, args, dur = begin.get("name"), begin.get("args") or {}, event["ts"] - begin["ts"]
+        elif phase == "X":
+            name, args, dur = event.get("name"), event.get("args") or {}, event.get("dur", 0)
+        else:
+            continue
+
+        if name in FILE_PHASES and "path" in args:
+            stats = files.setdefault(args["path"], {"parse": 0, "bind": 0, "check": 0})
+            stats[FILE_PHASES[name]] += dur
+        elif name == "checkExpression" and "path" in args:
+            stats = expressions.setdefault((args["path"], args.get("pos", 0)), [0, 0, 0])
+            stats[0] += dur
+            stats[1] += 1
+            stats[2] = max(stats[2], dur)
+
+def analyze_types(path: str, top: int) -> list:
+    """Most-instantiated generic types, aggregated by declaration: [(count, name, location)]."""
+    counts = {}
+    for entry in iter_json_array(path):
+        target = entry.get("instantiatedType")
+        if target is not None and target != entry.get("id"):
+            counts[target] = counts.get(target, 0) + 1
+    if not counts:
+        return []
+
+    # Second pass: resolve the generic targets to a name and declaration site
+    by_site = {}
+    for entry in iter_json_array(path):
+        count = counts.get(entry.get("id"))
+        if not count:
+            continue
+        decl = entry.get("firstDeclaration") or {}
+        name = entry.get("symbolName") or entry.get("intrinsicName") or f"type #{entry['id']}"
+        location = f"{decl['path']}:{decl['start']['line']}" if decl.get("path") else "?"
+        key = (name, location)
+        by_site[key] = by_site.get(key, 0) + count
+    ranked = sorted(by_site.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [(count, name, location) for (name, location), count in ranked]
+
+def line_of(path: str, pos: int) -> int:
+    """1-based line of a node position (tsc positions include leading trivia)."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return 0
+    pos = _LEADING_TRIVIA.match(text, min(pos, len(text))).end()
+    return text.count("\n", 0, pos) + 1
+
+def analyze_trace(trace_dir: str, top: int = TRACE_TOP) -> dict:
+    """Aggregate every trace in trace_dir into ranked hot-spot lists."""
+    files, expressions, types = {}, {}, []
+    pairs = trace_files(trace_dir)
+    for trace_path, types_path in pairs:
+        analyze_trace_events(trace_path, files, expressions)
+        if types_path:
+            types.extend(analyze_types(types_path, top))
+
+    slowest_files = sorted(files.items(), key=lambda item: sum(item[1].values()), reverse=True)[:top]
+    costliest = sorted(expressions.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    costliest = [(f"{path}:{line_of(path, pos)}", *stats) for (path, pos), stats in costliest]
+    types.sort(reverse=True)
+    return {"projects": len(pairs), "files": slowest_files, "expressions": costliest, "types": types[:top]}
+
+def format_us(us: float) -> str:
+    return f"{us / 1000:.0f}ms"
+
+def display_path(path: str) -> str:
+    try:
+        return os.path.relpath(path)
+    except ValueError:
+        return path
+
+async def check_trace(ctx) -> list:
+    """Trace the shared tsc run (unless analysing an existing trace) and rank the hot spots."""
+    if not ctx.trace:
+        return []
+    lines = ["\n🔥 Type Check Hot Spots (--generateTrace):", "-" * 40]
+
+    if ctx.run_trace:
+        output = await asyncio.shield(ctx.tsc.output())
+        if not trace_files(ctx.trace):
+            lines.append("  ⚠️ tsc did not write a trace")
+            lines.append(output.strip()[:500])
+            return lines
+
+    loop = asyncio.get_running_loop()
+    report = await loop.run_in_executor(None, analyze_trace, ctx.trace)
+    if not report["projects"]:
+        lines.append(f"  ⚠️ No trace.json found in {ctx.trace}")
+        return lines
+
+    lines.append(f"  Slowest files ({'parse':>7} {'bind':>7} {'check':>7}):")
+    for path, stats in report["files"]:
+        phases = " ".join(f"{format_us(stats[phase]):>7}" for phase in ("parse", "bind", "check"))
+        lines.append(f"    {phases}  {display_path(path)}")
+
+    lines.append(f"\n  Costliest checkExpression spans ({'total':>7} {'count':>5} {'max':>7}):")
+    if not report["expressions"]:
+        lines.append("    ✅ No expression took long enough to be traced")
+    for location, total, count, longest in report["expressions"]:
+        lines.append(f"    {format_us(total):>7} {count:>5} {format_us(longest):>7}  {display_path(location)}")
+
+    lines.append("\n  Most-instantiated types:")
+    if not report["types"]:
+        lines.append("    ⚪ No types.json in trace")
+    for count, name, location in report["types"]:
+        lines.append(f"    {count:>9,}  {name}  ({display_path(location)})")
+    lines.append(f"\n  Trace: {ctx.trace} ({report['projects']} project{'s' if report['projects'] != 1 else ''})")
+    return lines
+
+CHECKS = [
+    ("versions", check_versions),
+    ("tsconfig", check_tsconfig),
+    ("tooling", check_tooling),
+    ("monorepo", check_monorepo),
+    ("workspaces", check_workspaces),
+    ("any_usage", check_any_usage),
+    ("type_assertions", check_type_assertions),
+    ("source_hotspots", check_source_hotspots),
+    ("type_errors", check_type_errors),
+    ("performance", check_performance),
+    ("trace", check_trace),
+]
+
+class Context:
+    """Options and shared state passed to every check."""
+
+    def __init__(self, timeout: float, history: str = None, compare: str = None,
+                 threshold: float = DEFAULT_THRESHOLD, trace: str = None, run_trace: bool = True,
+                 workspaces: bool = False, jobs: int = 1, force: bool = False):
+        self.timeout = timeout
+        self.workspaces = workspaces
+        self.jobs = jobs
+        self.force = force
+        self.trace = trace
+        self.run_trace = run_trace
+        self.history = history
+        self.compare = compare
+        self.threshold = threshold
+        self.regressions = []
+        self.tsc = TscRun(timeout, trace_dir=trace if run_trace else None)
+        self.sources = SourceScan()
+
+async def timed_check(name: str, check, ctx) -> list:
+    """Run one check under the hard timeout and flag it if it exceeds its budget."""
+    started = time.perf_counter()
+    timeout = None if name in PER_UNIT_TIMEOUT_CHECKS else ctx.timeout
+    try:
+        lines = await asyncio.wait_for(check(ctx), timeout)
+    except asyncio.TimeoutError:
+        return [f"\n⛔ {name}: timed out after {ctx.timeout:.0f}s"]
+    except Exception as e:
+        return [f"\n❌ {name}: {e}"]
+    elapsed = time.perf_counter() - started
+    budget = CHECK_BUDGETS.get(name)
+    if budget is not None and elapsed > budget:
+        lines.append(f"  ⏳ {name} took {elapsed:.1f}s (budget {budget}s)")
+    return lines
+
+async def run_checks(ctx):
+    """Start every check at once; print reports in order as soon as each is ready."""
+    tasks = [asyncio.ensure_future(timed_check(name, check, ctx)) for name, check in CHECKS]
+    for task in tasks:
+        for line in await task:
+            print(line)
+        sys.stdout.flush()
 
 def main():
+    parser = argparse.ArgumentParser(description="TypeScript Project Diagnostic")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Hard timeout per check, or per package with --workspaces, in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_HISTORY, metavar="PATH",
+                        help=f"Record tsc metrics, one JSON line per run, in PATH (default: {DEFAULT_HISTORY})")
+    parser.add_argument("--compare", nargs="?", const="previous", metavar="COMMIT",
+                        help="Compare tsc metrics with history (the previous commit, or COMMIT); implies --history")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Regression threshold in percent for --compare (default: {DEFAULT_THRESHOLD:g})")
+    parser.add_argument("--trace", nargs="?", const=DEFAULT_TRACE_DIR, metavar="DIR",
+                        help=f"Run tsc --generateTrace into DIR (default: {DEFAULT_TRACE_DIR}) and report hot spots")
+    parser.add_argument("--analyze-trace", metavar="DIR",
+                        help="Report hot spots from an existing --generateTrace directory without running tsc")
+    parser.add_argument("--workspaces", action="store_true",
+                        help="Type-check every pnpm/npm/Nx/Turbo workspace package concurrently")
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Packages type-checked at once with --workspaces (default: half the CPUs)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-check workspace packages even when nothing changed")
+    parser.add_argument("--self-check", action="store_true",
+                        help="Verify the source scanner against its built-in cases and exit")
+    args = parser.parse_args()
+
+    if args.self_check:
+        failures = self_check()
+        for failure in failures:
+            print(f"❌ {failure}")
+        print(f"{len(SCAN_CASES) - len(failures)}/{len(SCAN_CASES)} scanner cases passed")
+        sys.exit(1 if failures else 0)
+
     print("=" * 50)
     print("🔍 TypeScript Project Diagnostic Report")
     print("=" * 50)
-    
-    check_versions()
-    check_tsconfig()
-    check_tooling()
-    check_monorepo()
-    check_any_usage()
-    check_type_assertions()
-    check_type_errors()
-    check_performance()
-    
+
+    started = time.perf_counter()
+    history = args.history or (DEFAULT_HISTORY if args.compare else None)  # Opt-in: nothing written otherwise
+    ctx = Context(args.timeout, history=history,
+                  compare=args.compare, threshold=args.threshold,
+                  trace=args.analyze_trace or args.trace, run_trace=not args.analyze_trace,
+                  workspaces=args.workspaces, jobs=max(1, args.jobs), force=args.force)
+    asyncio.run(run_checks(ctx))
+
     print("\n" + "=" * 50)
-    print("✅ Diagnostic Complete")
+    print(f"✅ Diagnostic Complete ({time.perf_counter() - started:.1f}s)")
     print("=" * 50)
+    if ctx.regressions:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
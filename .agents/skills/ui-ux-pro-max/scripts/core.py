@@ -12,8 +12,14 @@ from collections import defaultdict
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+INDEX_DIR = DATA_DIR / ".index"
 MAX_RESULTS = 3
 
+# Retrieval modes: lexical BM25, dense vectors, or a weighted fusion of both
+SEARCH_MODES = ["bm25", "dense", "hybrid"]
+DEFAULT_MODE = "bm25"
+HYBRID_ALPHA = 0.5  # weight of the normalized BM25 score in hybrid mode
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
@@ -165,8 +171,73 @@ def _load_csv(filepath):
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+def _all_sources():
+    """(relative file, search columns) for every searchable CSV"""
+    sources = [(config["file"], config["search_cols"]) for config in CSV_CONFIG.values()]
+    sources += [(config["file"], _STACK_COLS["search_cols"]) for config in STACK_CONFIG.values()]
+    return sources
+
+
+_vector_index = None
+
+
+def build_vector_index(force=False):
+    """Build (if stale) and return the dense retrieval index over all CSVs"""
+    global _vector_index
+    from vectors import VectorIndex, build_index, read_signature
+
+    sources = [(file, cols) for file, cols in _all_sources() if (DATA_DIR / file).exists()]
+    signature = []
+    for file, _ in sources:
+        stat = (DATA_DIR / file).stat()
+        signature.append([file, stat.st_mtime_ns, stat.st_size])
+
+    if force or read_signature(INDEX_DIR) != signature:
+        tokenizer = BM25()
+        documents = {}
+        for file, cols in sources:
+            data = _load_csv(DATA_DIR / file)
+            documents[file] = [tokenizer.tokenize(" ".join(str(row.get(col, "")) for col in cols)) for row in data]
+        build_index(INDEX_DIR, documents, signature)
+        _vector_index = None
+
+    if _vector_index is None:
+        _vector_index = VectorIndex(INDEX_DIR)
+    return _vector_index
+
+
+def _rank(segments, documents, query, mode):
+    """Rank documents for a query: [(idx, score)] sorted by score
+
+    segments: [(filepath, start)] - where each CSV's rows begin in documents
+    """
+    if mode == "bm25":
+        bm25 = BM25()
+        bm25.fit(documents)
+        return bm25.score(query)
+
+    index = build_vector_index()
+    tokens = BM25().tokenize(query)
+    dense = []
+    for filepath, start in segments:
+        source = filepath.relative_to(DATA_DIR).as_posix()
+        dense.extend((start + idx, score) for idx, score in index.score(source, tokens))
+    dense.sort(key=lambda x: x[1], reverse=True)
+    if mode == "dense":
+        return dense
+
+    bm25 = BM25()
+    bm25.fit(documents)
+    lexical = bm25.score(query)
+    top = lexical[0][1] if lexical and lexical[0][1] > 0 else 1
+    fused = {idx: HYBRID_ALPHA * score / top for idx, score in lexical}
+    for idx, score in dense:
+        fused[idx] = fused.get(idx, 0) + (1 - HYBRID_ALPHA) * max(score, 0)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, mode=DEFAULT_MODE):
+    """Core search function using BM25, dense vectors or both"""
     if not filepath.exists():
         return []
 
@@ -175,10 +246,7 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     # Build documents from search columns
     documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    ranked = _rank([(filepath, 0)], documents, query, mode)
 
     # Get top results with score > 0
     results = []
@@ -213,7 +281,7 @@ def detect_domain(query):
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
+def search(query, domain=None, max_results=MAX_RESULTS, mode=DEFAULT_MODE):
     """Main search function with auto-domain detection"""
     if domain is None:
         domain = detect_domain(query)
@@ -224,10 +292,11 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, mode)
 
     return {
         "domain": domain,
+        "mode": mode,
         "query": query,
         "file": config["file"],
         "count": len(results),
@@ -235,7 +304,7 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
+def search_stack(query, stack, max_results=MAX_RESULTS, mode=DEFAULT_MODE):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
@@ -245,13 +314,67 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results, mode)
 
     return {
         "domain": "stack",
+        "mode": mode,
         "stack": stack,
         "query": query,
         "file": STACK_CONFIG[stack]["file"],
         "count": len(results),
         "results": results
     }
+
+
+def _resolve_stacks(stacks):
+    """Normalize a stack list (names, comma-separated names or "all")"""
+    if isinstance(stacks, str):
+        stacks = [stacks]
+    names = [name.strip() for item in stacks for name in item.split(",") if name.strip()]
+    if "all" in names:
+        return list(AVAILABLE_STACKS)
+    return list(dict.fromkeys(names))
+
+
+def search_stacks(query, stacks, max_results=MAX_RESULTS, mode=DEFAULT_MODE):
+    """Search several stacks in one pass over a shared index (corpus-wide IDF)"""
+    stacks = _resolve_stacks(stacks)
+    unknown = [stack for stack in stacks if stack not in STACK_CONFIG]
+    if unknown or not stacks:
+        return {"error": f"Unknown stack: {', '.join(unknown) or '(none)'}. Available: {', '.join(AVAILABLE_STACKS)}, all"}
+
+    # Load every stack file once into one shared document list
+    rows, owners, documents, segments = [], [], [], []
+    for stack in stacks:
+        filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+        if not filepath.exists():
+            return {"error": f"Stack file not found: {filepath}", "stack": stack}
+        segments.append((filepath, len(documents)))
+        for row in _load_csv(filepath):
+            rows.append(row)
+            owners.append(stack)
+            documents.append(" ".join(str(row.get(col, "")) for col in _STACK_COLS["search_cols"]))
+
+    # Single ranking pass, then merge top-k per stack
+    results = {stack: [] for stack in stacks}
+    remaining = len(stacks)
+    for idx, score in _rank(segments, documents, query, mode):
+        if score <= 0 or not remaining:
+            break
+        bucket = results[owners[idx]]
+        if len(bucket) < max_results:
+            row = rows[idx]
+            bucket.append({col: row.get(col, "") for col in _STACK_COLS["output_cols"] if col in row})
+            if len(bucket) == max_results:
+                remaining -= 1
+
+    return {
+        "domain": "stack",
+        "mode": mode,
+        "stacks": stacks,
+        "query": query,
+        "files": [STACK_CONFIG[stack]["file"] for stack in stacks],
+        "count": sum(len(items) for items in results.values()),
+        "results": results
+    }
@@ -2,15 +2,15 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
-Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+Usage: python search.py "<query>" [--domain <domain>] [--stack <stack> [<stack> ...] | all] [--max-results 3] [--mode bm25|dense|hybrid]
        python search.py "<query>" --design-system [-p "Project Name"]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
+Stacks: html-tailwind, react, nextjs, ... (several at once, or all)
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, SEARCH_MODES, DEFAULT_MODE, search, search_stack, search_stacks
 from design_system import generate_design_system
 
 
@@ -20,6 +20,15 @@ def format_output(result):
         return f"Error: {result['error']}"
 
     output = []
+    if result.get("stacks"):
+        output.append(f"## UI Pro Max Stack Guidelines")
+        output.append(f"**Stacks:** {', '.join(result['stacks'])} | **Query:** {result['query']}")
+        output.append(f"**Sources:** {', '.join(result['files'])} | **Found:** {result['count']} results\n")
+        for stack, rows in result['results'].items():
+            output.append(f"### {stack}")
+            output.extend(_format_rows(rows))
+        return "\n".join(output)
+
     if result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
         output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
@@ -28,7 +37,14 @@ def format_output(result):
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
-    for i, row in enumerate(result['results'], 1):
+    output.extend(_format_rows(result['results']))
+    return "\n".join(output)
+
+
+def _format_rows(rows):
+    """Format result rows as markdown bullet blocks"""
+    output = []
+    for i, row in enumerate(rows, 1):
         output.append(f"### Result {i}")
         for key, value in row.items():
             value_str = str(value)
@@ -36,16 +52,16 @@ def format_output(result):
                 value_str = value_str[:300] + "..."
             output.append(f"- **{key}:** {value_str}")
         output.append("")
-
-    return "\n".join(output)
+    return output
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
     parser.add_argument("query", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stack", "-s", nargs="+", metavar="STACK", help=f"Stack-specific search, one or more of: {', '.join(AVAILABLE_STACKS)} (or all)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--mode", "-m", choices=SEARCH_MODES, default=DEFAULT_MODE, help="Retrieval mode: bm25, dense (vector) or hybrid (default: bm25)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
@@ -60,7 +76,11 @@ if __name__ == "__main__":
         print(result)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        stacks = [name for item in args.stack for name in item.split(",") if name]
+        if len(stacks) == 1 and stacks[0] != "all":
+            result = search_stack(args.query, stacks[0], args.max_results, args.mode)
+        else:
+            result = search_stacks(args.query, stacks, args.max_results, args.mode)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -68,7 +88,7 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = search(args.query, args.domain, args.max_results, args.mode)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Vectors - CPU-only dense retrieval for UI/UX style guides
+
+Rows are embedded offline with a random-indexing projection: every term gets a
+hashed sparse signature plus the sum of the signatures of the rows it occurs in,
+so terms that co-occur anywhere in the data (e.g. "healthcare", "calm",
+"wellness") end up close together. Vectors are stored as float32 files that are
+memory-mapped at query time and searched through an IVF (inverted file) index.
+
+Usage:
+    python vectors.py --build      # (re)build the index under data/.index
+"""
+
+import json
+import mmap
+import os
+import random
+from array import array
+from collections import defaultdict
+from hashlib import blake2b
+from math import log, sqrt
+from operator import mul
+from pathlib import Path
+
+# ============ CONFIGURATION ============
+INDEX_VERSION = 1
+DIM = 256
+SIGNATURE_NNZ = 8
+KMEANS_ITERATIONS = 8
+DEFAULT_NPROBE = 4
+
+MANIFEST_FILE = "manifest.json"
+TERMS_FILE = "terms.f32"
+DOCS_FILE = "docs.f32"
+CENTROIDS_FILE = "centroids.f32"
+
+
+# ============ PROJECTION ============
+def _signature(key):
+    """Sparse random +-1 vector for a key, stable across processes"""
+    digest = blake2b(key.encode("utf-8"), digest_size=SIGNATURE_NNZ * 2).digest()
+    weight = 1 / sqrt(SIGNATURE_NNZ)
+    sig = {}
+    for i in range(SIGNATURE_NNZ):
+        pos = ((digest[2 * i] << 8) | digest[2 * i + 1]) % DIM
+        sig[pos] = weight if (digest[2 * i] & 1) else -weight
+    return sig
+
+
+def _normalize(vec):
+    """L2-normalize a dense vector in place, returns False for zero vectors"""
+    norm = sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        return False
+    for i in range(len(vec)):
+        vec[i] /= norm
+    return True
+
+
+def _dot(vec, view, offset):
+    """Dot product between a query vector and one row of a float32 view"""
+    return sum(map(mul, vec, view[offset:offset + DIM]))
+
+
+def _kmeans(vectors, k, seed=0):
+    """Spherical k-means over normalized vectors, returns (centroids, lists)"""
+    rng = random.Random(seed)
+    centroids = [list(vectors[i]) for i in rng.sample(range(len(vectors)), k)]
+    assignment = [0] * len(vectors)
+
+    for _ in range(KMEANS_ITERATIONS):
+        for i, vec in enumerate(vectors):
+            assignment[i] = max(range(k), key=lambda c: sum(map(mul, vec, centroids[c])))
+
+        sums = [[0.0] * DIM for _ in range(k)]
+        for i, vec in enumerate(vectors):
+            acc = sums[assignment[i]]
+            for d in range(DIM):
+                acc[d] += vec[d]
+        for c in range(k):
+            if _normalize(sums[c]):
+                centroids[c] = sums[c]
+
+    lists = [[] for _ in range(k)]
+    for i, c in enumerate(assignment):
+        lists[c].append(i)
+    return centroids, lists
+
+
+# ============ INDEX BUILD ============
+def build_index(index_dir, sources, signature):
+    """Embed tokenized documents and write the memory-mapped index.
+
+    sources: {name: [tokens, ...]} - one list of tokenized rows per CSV file
+    signature: opaque JSON value used to detect stale indexes
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    gitignore = index_dir / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("*\n", encoding="utf-8")
+
+    # Corpus-wide document frequencies and co-occurrence context
+    doc_freqs = defaultdict(int)
+    context = defaultdict(lambda: [0.0] * DIM)
+    n_docs = 0
+    for name, docs in sources.items():
+        for idx, tokens in enumerate(docs):
+            n_docs += 1
+            row_sig = _signature(f"doc:{name}:{idx}")
+            for word in set(tokens):
+                doc_freqs[word] += 1
+                ctx = context[word]
+                for pos, val in row_sig.items():
+                    ctx[pos] += val
+
+    vocab = sorted(doc_freqs)
+    idf = {w: log((n_docs - doc_freqs[w] + 0.5) / (doc_freqs[w] + 0.5) + 1) for w in vocab}
+
+    term_vectors = {}
+    terms = array("f")
+    for word in vocab:
+        vec = context[word]
+        _normalize(vec)
+        for pos, val in _signature(f"term:{word}").items():
+            vec[pos] += val
+        _normalize(vec)
+        term_vectors[word] = vec
+        terms.extend(vec)
+
+    docs_out = array("f")
+    centroids_out = array("f")
+    meta_sources = {}
+    for name, docs in sources.items():
+        vectors = []
+        for tokens in docs:
+            tf = defaultdict(int)
+            for word in tokens:
+                tf[word] += 1
+            vec = [0.0] * DIM
+            for word, count in tf.items():
+                weight = (1 + log(count)) * idf[word]
+                tv = term_vectors[word]
+                for d in range(DIM):
+                    vec[d] += weight * tv[d]
+            _normalize(vec)
+            vectors.append(vec)
+
+        nlist = max(1, int(sqrt(len(vectors)))) if vectors else 0
+        centroids, lists = _kmeans(vectors, nlist) if vectors else ([], [])
+        meta_sources[name] = {
+            "rows": len(vectors),
+            "offset": len(docs_out) // DIM,
+            "centroid_offset": len(centroids_out) // DIM,
+            "lists": lists
+        }
+        for vec in vectors:
+            docs_out.extend(vec)
+        for vec in centroids:
+            centroids_out.extend(vec)
+
+    for filename, data in ((TERMS_FILE, terms), (DOCS_FILE, docs_out), (CENTROIDS_FILE, centroids_out)):
+        tmp = index_dir / (filename + ".tmp")
+        with open(tmp, "wb") as f:
+            data.tofile(f)
+        os.replace(tmp, index_dir / filename)
+
+    manifest = {
+        "version": INDEX_VERSION,
+        "dim": DIM,
+        "signature": signature,
+        "vocab": {w: i for i, w in enumerate(vocab)},
+        "idf": [idf[w] for w in vocab],
+        "sources": meta_sources
+    }
+    tmp = index_dir / (MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, index_dir / MANIFEST_FILE)
+
+
+def read_signature(index_dir):
+    """Return the signature stored with an existing index, or None"""
+    path = Path(index_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != INDEX_VERSION or manifest.get("dim") != DIM:
+        return None
+    return manifest.get("signature")
+
+
+# ============ INDEX SEARCH ============
+def _map_floats(path):
+    """Memory-map a float32 file as a flat memoryview"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(array("f"))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm).cast("f")
+
+
+class VectorIndex:
+    """Read-only view over a built index (vectors stay on disk, memory-mapped)"""
+
+    def __init__(self, index_dir):
+        index_dir = Path(index_dir)
+        with open(index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.vocab = manifest["vocab"]
+        self.idf = manifest["idf"]
+        self.sources = manifest["sources"]
+        self.terms = _map_floats(index_dir / TERMS_FILE)
+        self.docs = _map_floats(index_dir / DOCS_FILE)
+        self.centroids = _map_floats(index_dir / CENTROIDS_FILE)
+
+    def embed(self, tokens):
+        """Embed query tokens; unknown terms carry no signal"""
+        vec = [0.0] * DIM
+        for word in tokens:
+            row = self.vocab.get(word)
+            if row is None:
+                continue
+            weight = self.idf[row]
+            offset = row * DIM
+            for d, val in enumerate(self.terms[offset:offset + DIM]):
+                vec[d] += weight * val
+        return vec if _normalize(vec) else None
+
+    def score(self, name, tokens, nprobe=DEFAULT_NPROBE):
+        """Cosine scores for rows in the nprobe closest IVF cells: [(idx, score)]"""
+        source = self.sources.get(name)
+        query = self.embed(tokens)
+        if source is None or query is None or not source["rows"]:
+            return []
+
+        lists = source["lists"]
+        base = source["centroid_offset"]
+        cells = sorted(
+            range(len(lists)),
+            key=lambda c: _dot(query, self.centroids, (base + c) * DIM),
+            reverse=True
+        )[:nprobe]
+
+        offset = source["offset"]
+        scores = [(idx, _dot(query, self.docs, (offset + idx) * DIM)) for c in cells for idx in lists[c]]
+        return sorted(scores, key=lambda x: x[1], reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    from core import build_vector_index, INDEX_DIR
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Vector Index")
+    parser.add_argument("--build", action="store_true", help="Rebuild the dense retrieval index")
+    args = parser.parse_args()
+
+    if args.build:
+        build_vector_index(force=True)
+        print(f"Index written to {INDEX_DIR}")
+    else:
+        parser.print_help()